@@ -1,20 +1,69 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request, Response, BackgroundTasks, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument, UpdateOne, monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from pymongo.errors import BulkWriteError, PyMongoError
 import os
 import logging
 import shutil
+import glob
+import hashlib
+import math
+import bisect
+import cProfile
+import contextvars
+import pstats
+import random
+import re
+import gzip
+import html
+import io
+import csv
+import smtplib
+from email.message import EmailMessage
+from itertools import islice
+import mimetypes
+import unicodedata
+import stat as stat_module
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, ValidationError
+from typing import List, Literal, Optional, Union
 import uuid
+from urllib.parse import parse_qsl, urlencode
 from datetime import datetime, timezone, timedelta
 import jwt
+import requests
 import bcrypt
 import base64
+import json
+import warnings
+import time
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import weakref
+
+try:
+    from PIL import Image, ImageOps, features as pil_features
+except ImportError:  # Pillow is optional: without it images are served as uploaded
+    Image = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional: only needed for FAST_JSON_RESPONSES
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: gzip is always available
+    brotli = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -23,35 +72,551 @@ load_dotenv(ROOT_DIR / '.env')
 UPLOAD_DIR = ROOT_DIR / "uploads"
 IMAGES_DIR = UPLOAD_DIR / "images"
 DOCUMENTS_DIR = UPLOAD_DIR / "documents"
+# Partial uploads are written here, outside the static mount, then renamed into place
+UPLOAD_TMP_DIR = Path(os.environ.get('UPLOAD_TMP_DIR', str(ROOT_DIR / "uploads_tmp")))
 IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 DOCUMENTS_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_TMP_DIR.mkdir(parents=True, exist_ok=True)
 
 ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/webp", "image/gif"]
 ALLOWED_DOC_TYPES = ["application/pdf", "application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Resized copies generated next to each uploaded image, e.g. <name>_w640.webp
+IMAGE_DERIVATIVE_WIDTHS = [int(w) for w in os.environ.get('IMAGE_DERIVATIVE_WIDTHS', '320,640,1280').split(',') if w.strip()]
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', '75'))
+
+def _supported_derivative_formats() -> list:
+    if Image is None:
+        return []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return [fmt for fmt in ("avif", "webp") if pil_features.check(fmt)]
+
+IMAGE_DERIVATIVE_FORMATS = _supported_derivative_formats()
+
+# Uploaded files never change under a given name (content hash or uuid), so browsers may keep them for good
+UPLOADS_CACHE_CONTROL = os.environ.get('UPLOADS_CACHE_CONTROL', 'public, max-age=31536000, immutable')
+
+# JSON responses at least this large are compressed when the client accepts it
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_ENCODINGS = ["br", "gzip"] if brotli else ["gzip"]
+# Uploaded documents of these types also get .br/.gz siblings, served as-is to clients that accept them
+PRECOMPRESSED_TYPES = ["application/pdf", "application/msword"]
+
+# Search: results per page, and how deep pagination may go
+SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', '20'))
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', '200'))
+SNIPPET_LENGTH = 180
+
+# List routes return documents written by this server: with this on they are encoded with orjson
+# without being validated again against their response model
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() in ('1', 'true', 'yes') and orjson is not None
+
+# CSV member imports are parsed and inserted this many rows at a time
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '500'))
+MAX_IMPORT_SIZE = int(os.environ.get('MAX_IMPORT_SIZE', str(20 * 1024 * 1024)))
+EXPORT_BATCH_SIZE = 500
+
+# Largest batch accepted by the bulk admin endpoints
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', '500'))
+
+# List endpoints are paginated on (created_at, id); page size is bounded to cap memory per request
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '100'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '100'))
+
+# Opt-in request profiling: a request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is picked at
+# PROFILE_SAMPLE_RATE; profiles of those slower than PROFILE_THRESHOLD_MS are written to PROFILE_DIR
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_THRESHOLD_MS = float(os.environ.get('PROFILE_THRESHOLD_MS', '500'))
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', str(ROOT_DIR / "profiles")))
+PROFILING_ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+# Query parameters whose values never reach a profile report (the events stream takes its JWT as ?token=)
+PROFILE_REDACTED_PARAMS = {"token", "ticket", "access_token", "password"}
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'porte-du-savoir-secret-key-2024')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Password hashing: bcrypt runs on a bounded worker pool so it never blocks the event loop
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+BCRYPT_MAX_WORKERS = int(os.environ.get('BCRYPT_MAX_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Hash/verify calls allowed in flight (running + queued) before new ones are rejected with 429
+BCRYPT_MAX_PENDING = int(os.environ.get('BCRYPT_MAX_PENDING', str(BCRYPT_MAX_WORKERS * 4)))
+
+# Public /stats counts are served from memory for this long; writes invalidate them immediately
+STATS_CACHE_TTL_SECONDS = float(os.environ.get('STATS_CACHE_TTL_SECONDS', '30'))
+
+# How often each worker checks the site_content version stamp to pick up writes made by other workers
+CONTENT_REFRESH_SECONDS = float(os.environ.get('CONTENT_REFRESH_SECONDS', '5'))
+
+# Authenticated principal cache
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get('AUTH_CACHE_TTL_SECONDS', '60'))
+AUTH_CACHE_MAX_SIZE = int(os.environ.get('AUTH_CACHE_MAX_SIZE', '1024'))
+# When enabled, the role/email/name claims of a valid token are trusted and the user lookup is skipped
+AUTH_TRUST_TOKEN_ROLE = os.environ.get('AUTH_TRUST_TOKEN_ROLE', 'false').lower() in ('1', 'true', 'yes')
+
+# New contact messages and membership applications are queued in an outbox and sent to admins as digests
+NOTIFY_SINK = os.environ.get('NOTIFY_SINK', 'none')  # none, file, webhook or smtp
+NOTIFY_FILE_PATH = os.environ.get('NOTIFY_FILE_PATH', str(ROOT_DIR / "notifications.log"))
+NOTIFY_WEBHOOK_URL = os.environ.get('NOTIFY_WEBHOOK_URL', '')
+NOTIFY_EMAIL_FROM = os.environ.get('NOTIFY_EMAIL_FROM', 'noreply@portedusavoir.org')
+NOTIFY_EMAIL_TO = [addr.strip() for addr in os.environ.get('NOTIFY_EMAIL_TO', '').split(',') if addr.strip()]
+SMTP_HOST = os.environ.get('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+SMTP_USER = os.environ.get('SMTP_USER', '')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes')
+# One digest at most every OUTBOX_DIGEST_SECONDS; failed deliveries back off exponentially from OUTBOX_RETRY_BASE_SECONDS
+OUTBOX_DIGEST_SECONDS = float(os.environ.get('OUTBOX_DIGEST_SECONDS', '60'))
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_RETRY_BASE_SECONDS = float(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', '30'))
+OUTBOX_RETRY_MAX_SECONDS = float(os.environ.get('OUTBOX_RETRY_MAX_SECONDS', '3600'))
+# Entries claimed by a worker that died mid-delivery become claimable again after this long
+OUTBOX_LEASE_SECONDS = float(os.environ.get('OUTBOX_LEASE_SECONDS', '300'))
+NOTIFY_TIMEOUT_SECONDS = float(os.environ.get('NOTIFY_TIMEOUT_SECONDS', '10'))
+# Sent and permanently failed entries are removed by a TTL index this long after their last delivery attempt
+OUTBOX_RETENTION_SECONDS = float(os.environ.get('OUTBOX_RETENTION_SECONDS', str(30 * 24 * 3600)))
+
+# Admin events stream: per-connection queue depth, keepalive interval, and how long stats pushes are coalesced
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', '100'))
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('EVENTS_KEEPALIVE_SECONDS', '15'))
+EVENTS_STATS_DEBOUNCE_SECONDS = float(os.environ.get('EVENTS_STATS_DEBOUNCE_SECONDS', '0.5'))
+# Writes handled by other workers are noticed by polling collection_versions this often while a dashboard listens
+EVENTS_POLL_SECONDS = float(os.environ.get('EVENTS_POLL_SECONDS', '5'))
+# EventSource URLs end up in access logs, so they carry a ticket valid this long instead of the session token
+EVENTS_TICKET_SECONDS = int(os.environ.get('EVENTS_TICKET_SECONDS', '60'))
+EVENTS_TICKET_AUDIENCE = "events"
+
+# Token buckets on the public write routes, keyed by client IP and route. A limit "N/S" allows bursts of N
+# requests, refilled at N per S seconds. RATE_LIMIT_BACKEND=mongo shares the buckets between workers.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))
+# Only behind exactly one reverse proxy that appends to X-Forwarded-For: its right-most entry (the address the
+# proxy saw) is used. Earlier entries are client-supplied. Behind uvicorn --proxy-headers leave this off.
+RATE_LIMIT_TRUST_FORWARDED = os.environ.get('RATE_LIMIT_TRUST_FORWARDED', 'false').lower() in ('1', 'true', 'yes')
+RATE_LIMITED_ROUTES = {
+    ("POST", "/api/contact"): os.environ.get('RATE_LIMIT_CONTACT', '5/60'),
+    ("POST", "/api/members/apply"): os.environ.get('RATE_LIMIT_MEMBERS_APPLY', '3/300'),
+    ("POST", "/api/auth/login"): os.environ.get('RATE_LIMIT_LOGIN', '10/60'),
+    ("POST", "/api/auth/register"): os.environ.get('RATE_LIMIT_REGISTER', '5/3600'),
+    ("POST", "/api/seed"): os.environ.get('RATE_LIMIT_SEED', '2/60'),
+}
+
+# ==================== METRICS ====================
+
+# /metrics serves Prometheus text format; when METRICS_TOKEN is set scrapers must send it as a bearer token
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+BCRYPT_LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0)
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(labelnames: tuple, labels: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = list(zip(labelnames, labels)) + ([extra] if extra else [])
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter per label values; safe to update from the driver's threads"""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        self.lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, *labels, amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self.lock:
+            values = list(self.values.items())
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"] + [
+            f"{self.name}{format_labels(self.labelnames, labels)} {value}" for labels, value in values
+        ]
+
+class Histogram:
+    """Cumulative-bucket histogram per label values"""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values = {}  # labels -> [per-bucket counts (+inf last), sum]
+        self.lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> list:
+        with self.lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self.values.items()]
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, help_text: str, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+        METRICS.append(self)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}", f"{self.name} {self.read()}"]
+
+class CallbackCounter(Gauge):
+    """Counter whose running total is kept elsewhere (e.g. by a driver listener) and read at scrape time"""
+
+    metric_type = "counter"
+
+METRICS = []
+
+http_requests_total = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+mongo_command_duration = Histogram("mongodb_command_duration_seconds", "MongoDB command latency", ("command",), MONGO_LATENCY_BUCKETS)
+mongo_command_failures = Counter("mongodb_command_failures_total", "Failed MongoDB commands", ("command",))
+bcrypt_duration = Histogram("bcrypt_duration_seconds", "bcrypt hash/verify time, queueing included", ("operation",), BCRYPT_LATENCY_BUCKETS)
+upload_bytes_total = Counter("upload_bytes_total", "Bytes received in accepted uploads", ("kind",))
+uploads_total = Counter("uploads_total", "Accepted uploads", ("kind",))
+rate_limited_total = Counter("rate_limited_requests_total", "Requests rejected by the rate limiter", ("route",))
+
+class CommandMetrics(monitoring.CommandListener):
+    """Per-command latency from the driver's own timings"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+        mongo_command_failures.inc(event.command_name)
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters, updated by the driver from its I/O threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.open = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = {}
+        self.checkout_wait_seconds = 0.0
+        self.checkout_wait_max_seconds = 0.0
+        self.pool_clears = 0
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "max_size": MONGO_MAX_POOL_SIZE,
+                "open": self.open,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "checkout_wait_seconds": round(self.checkout_wait_seconds, 6),
+                "checkout_wait_max_seconds": round(self.checkout_wait_max_seconds, 6),
+                "pool_clears": self.pool_clears,
+            }
+
+    def connection_created(self, event):
+        with self.lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        # Check-out starts and completes on the same thread
+        self.local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = time.perf_counter() - getattr(self.local, "started", time.perf_counter())
+        with self.lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.checkout_wait_seconds += waited
+            self.checkout_wait_max_seconds = max(self.checkout_wait_max_seconds, waited)
+
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.in_use -= 1
+
+    def pool_cleared(self, event):
+        with self.lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+pool_metrics = PoolMetrics()
+
+command_metrics = CommandMetrics()
+
+Gauge("mongodb_pool_connections_open", "Pooled connections open", lambda: pool_metrics.open)
+Gauge("mongodb_pool_connections_in_use", "Pooled connections checked out", lambda: pool_metrics.in_use)
+Gauge("mongodb_pool_max_size", "Connection pool maximum size", lambda: MONGO_MAX_POOL_SIZE)
+# Totals since startup are counters, so rate() handles worker restarts
+CallbackCounter("mongodb_pool_checkouts_total", "Connection check-outs", lambda: pool_metrics.checkouts)
+CallbackCounter("mongodb_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", lambda: round(pool_metrics.checkout_wait_seconds, 6))
+CallbackCounter("mongodb_pool_clears_total", "Connection pool clears", lambda: pool_metrics.pool_clears)
+
+class MetricsMiddleware:
+    """Request count and latency per route template (e.g. /api/projects/{project_id}), so label cardinality stays bounded"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; rate-limited and unknown paths have none
+            route = scope.get("route")
+            template = getattr(route, "path", None) or (scope["path"] if (scope["method"], scope["path"]) in RATE_LIMITED_ROUTES else "unmatched")
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], template)
+            http_requests_total.inc(scope["method"], template, status_code)
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ==================== PROFILING ====================
+
+# Mongo commands issued by the request being profiled; None outside profiled requests.
+# Motor runs each operation under a copy of the caller's context, so the driver's listener thread sees it.
+profiled_commands = contextvars.ContextVar("profiled_commands", default=None)
+
+class ProfileCommandListener(monitoring.CommandListener):
+    """Records each command of a profiled request; one context lookup for all other requests"""
+
+    def started(self, event):
+        commands = profiled_commands.get()
+        if commands is not None:
+            target = event.command.get(event.command_name)
+            commands[event.request_id] = {
+                "command": event.command_name,
+                "database": event.database_name,
+                "collection": target if isinstance(target, str) else None,
+                "duration_ms": None,
+                "ok": None,
+            }
+
+    def succeeded(self, event):
+        self.finish(event, True)
+
+    def failed(self, event):
+        self.finish(event, False)
+
+    def finish(self, event, ok: bool):
+        commands = profiled_commands.get()
+        if commands is not None and event.request_id in commands:
+            commands[event.request_id].update(duration_ms=round(event.duration_micros / 1000, 3), ok=ok)
+
+profile_command_listener = ProfileCommandListener()
+
+def redact_query(query_string: bytes) -> str:
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode([(key, "REDACTED" if key.lower() in PROFILE_REDACTED_PARAMS else value) for key, value in params])
+
+def write_profile(profile: dict, profiler: Optional[cProfile.Profile]):
+    """Save <name>.json (request, Mongo commands, top functions) and, with a call-stack profile, <name>.prof for pstats/snakeviz"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    route = re.sub(r"[^A-Za-z0-9]+", "-", profile["path"]).strip("-") or "root"
+    name = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{profile['method']}-{route}-{uuid.uuid4().hex[:8]}"
+    if profiler is not None:
+        profiler.dump_stats(PROFILE_DIR / f"{name}.prof")
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+        profile["top_functions"] = summary.getvalue()
+    with open(PROFILE_DIR / f"{name}.json", "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    logger.info("Slow request profile written to %s", PROFILE_DIR / f"{name}.json")
+
+class ProfilingMiddleware:
+    """Profiles opted-in requests; only registered when PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set.
+
+    cProfile sees everything running on the event loop thread, so a single request holds the
+    profiler at a time; requests profiled concurrently still get their Mongo command list.
+    Event streams are long-lived by design: profiling stops as soon as one starts and nothing is saved.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.profiler_busy = False
+
+    def wants_profile(self, scope) -> bool:
+        if PROFILE_TOKEN and Headers(scope=scope).get("x-profile") == PROFILE_TOKEN:
+            return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        streaming = False
+        profiler = None
+
+        def stop_profiler():
+            nonlocal profiler
+            if profiler is not None:
+                profiler.disable()
+                profiler = None
+                self.profiler_busy = False
+
+        async def send_with_status(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream"):
+                    streaming = True
+                    stop_profiler()
+            await send(message)
+
+        commands = {}
+        token = profiled_commands.set(commands)
+        if not self.profiler_busy:
+            self.profiler_busy = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            kept_profiler = profiler
+            stop_profiler()
+            profiled_commands.reset(token)
+            if duration_ms >= PROFILE_THRESHOLD_MS and not streaming:
+                profile = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": redact_query(scope.get("query_string", b"")),
+                    "status": status_code,
+                    "duration_ms": round(duration_ms, 3),
+                    "mongo_time_ms": round(sum(c["duration_ms"] or 0 for c in commands.values()), 3),
+                    "mongo_commands": list(commands.values()),
+                }
+                await asyncio.to_thread(write_profile, profile, kept_profiler)
+
+# ==================== DATABASE ====================
+
+# MongoDB connection. Options left unset keep the driver defaults (or whatever MONGO_URL specifies).
+mongo_url = os.environ['MONGO_URL']
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_MAX_IDLE_TIME_MS = os.environ.get('MONGO_MAX_IDLE_TIME_MS')
+# How long a query may wait for a free pooled connection before failing
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS')
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = os.environ.get('MONGO_SOCKET_TIMEOUT_MS')
+# Wire compression in order of preference, e.g. "zstd,snappy,zlib"; zstd and snappy need the zstandard / python-snappy packages
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')
+# Read preference of public GET routes, e.g. secondaryPreferred, bounded by MONGO_PUBLIC_MAX_STALENESS_SECONDS (>= 90).
+# Only anonymous requests use it: the admin screens list content through the same routes and must see their own writes
+MONGO_PUBLIC_READ_PREFERENCE = os.environ.get('MONGO_PUBLIC_READ_PREFERENCE', 'primary')
+MONGO_PUBLIC_MAX_STALENESS_SECONDS = int(os.environ.get('MONGO_PUBLIC_MAX_STALENESS_SECONDS', '-1'))
+
+def mongo_client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "event_listeners": [pool_metrics] + ([command_metrics] if METRICS_ENABLED else []) + ([profile_command_listener] if PROFILING_ENABLED else []),
+    }
+    if MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = int(MONGO_MAX_IDLE_TIME_MS)
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = int(MONGO_WAIT_QUEUE_TIMEOUT_MS)
+    if MONGO_SOCKET_TIMEOUT_MS:
+        options["socketTimeoutMS"] = int(MONGO_SOCKET_TIMEOUT_MS)
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+client = AsyncIOMotorClient(mongo_url, **mongo_client_options())
+db = client[os.environ['DB_NAME']]
+# Anonymous public GET routes read through this handle (see reader); it is `db` itself unless another read preference is configured
+read_db = client.get_database(
+    os.environ['DB_NAME'],
+    read_preference=make_read_preference(read_pref_mode_from_name(MONGO_PUBLIC_READ_PREFERENCE), None, MONGO_PUBLIC_MAX_STALENESS_SECONDS)
+) if MONGO_PUBLIC_READ_PREFERENCE != 'primary' else db
+
+def reader(request: Request):
+    """Handle for a public GET route: callers sending credentials read from the primary, visitors through read_db.
+    The header is not verified here; a forged one only moves that request to the primary."""
+    return db if "authorization" in request.headers else read_db
+
+# ==================== APP ====================
+
 app = FastAPI(title="Porte du Savoir API")
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -96,6 +661,18 @@ class ProjectResponse(ProjectBase):
     created_at: str
     updated_at: str
 
+class ProjectSummary(BaseModel):
+    """Project as shown on listing cards: no objectives"""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: str
+    description: str
+    status: str
+    image_url: Optional[str] = None
+    date: Optional[str] = None
+    created_at: str
+    updated_at: str
+
 class ArticleBase(BaseModel):
     title: str
     content: str
@@ -113,6 +690,18 @@ class ArticleResponse(ArticleBase):
     created_at: str
     updated_at: str
 
+class ArticleSummary(BaseModel):
+    """Article as shown on listing cards: no content body"""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: str
+    excerpt: str
+    category: str
+    image_url: Optional[str] = None
+    published: bool = True
+    created_at: str
+    updated_at: str
+
 class MemberBase(BaseModel):
     name: str
     email: EmailStr
@@ -181,46 +770,684 @@ class SiteContentResponse(BaseModel):
     key: str
     value: str
 
+class BulkIds(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class BulkApprove(BulkIds):
+    member_type: str = "actif"
+
+class BulkContentUpdate(BaseModel):
+    items: List[SiteContentUpdate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class BulkItemResult(BaseModel):
+    id: str  # member/message id, or content key
+    status: str
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+
+class ImportRowError(BaseModel):
+    row: int  # line number in the CSV file, header being line 1
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    rows: int
+    imported: int
+    errors: List[ImportRowError]
+
 class StatsResponse(BaseModel):
     projects_count: int
     articles_count: int
     members_count: int
     messages_count: int
 
+class SearchResult(BaseModel):
+    type: str  # article, project, document
+    id: str
+    title: str
+    snippet: str  # HTML-escaped text with matches wrapped in <mark>
+    score: float
+    image_url: Optional[str] = None
+    file_url: Optional[str] = None
+    created_at: str
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    next_page: Optional[int] = None
+
+# ==================== CACHING ====================
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+# Principals keyed by user id, without the password hash
+user_cache = TTLCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_SIZE)
+
+def invalidate_user_cache(user_id: Optional[str] = None):
+    """Drop a cached principal after the user is changed or deleted (all of them if no id)"""
+    if user_id is None:
+        user_cache.clear()
+    else:
+        user_cache.pop(user_id)
+
 # ==================== AUTH HELPERS ====================
 
+bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+bcrypt_pending = 0
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
-def create_token(user_id: str, role: str) -> str:
+async def run_bcrypt(func, *args):
+    """Run a bcrypt call on the worker pool, rejecting it with 429 when the pool is saturated"""
+    global bcrypt_pending
+    if bcrypt_pending >= BCRYPT_MAX_PENDING:
+        raise HTTPException(
+            status_code=429,
+            detail="Serveur occupé, veuillez réessayer dans un instant",
+            headers={"Retry-After": "1"}
+        )
+    bcrypt_pending += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(bcrypt_executor, func, *args)
+    finally:
+        bcrypt_pending -= 1
+        bcrypt_duration.observe(time.perf_counter() - started, func.__name__)
+
+async def hash_password_async(password: str) -> str:
+    return await run_bcrypt(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await run_bcrypt(verify_password, password, hashed)
+
+def create_token(user_id: str, role: str, email: Optional[str] = None, name: Optional[str] = None) -> str:
     payload = {
         "sub": user_id,
         "role": role,
+        "email": email,
+        "name": name,
         "exp": datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def authenticate(token: str, audience: Optional[str] = None) -> dict:
+    """User behind a bearer token, from the token claims, the principal cache or the database.
+
+    Session tokens have no audience. Tokens minted for one use, like events stream tickets, carry
+    an `aud` claim: they only pass when that audience is asked for, and never as a bearer token.
+    """
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], audience=audience)
         user_id = payload.get("sub")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="Utilisateur non trouvé")
+        if AUTH_TRUST_TOKEN_ROLE and payload.get("role") and payload.get("email"):
+            return {"id": user_id, "email": payload["email"], "name": payload.get("name") or "", "role": payload["role"]}
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+            if not user:
+                raise HTTPException(status_code=401, detail="Utilisateur non trouvé")
+            user_cache.set(user_id, user)
         return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expiré")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token invalide")
 
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await authenticate(credentials.credentials)
+
 async def require_admin(user: dict = Depends(get_current_user)):
     if user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Accès admin requis")
     return user
 
+# ==================== BULK HELPERS ====================
+
+async def find_by_ids(collection, ids: list, *fields: str) -> dict:
+    """Existing documents among `ids`, keyed by id, in a single query"""
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in fields}}
+    docs = await collection.find({"id": {"$in": ids}}, projection).to_list(len(ids))
+    return {doc["id"]: doc for doc in docs}
+
+def bulk_response(ids: list, status_of) -> BulkResponse:
+    return BulkResponse(results=[BulkItemResult(id=item_id, status=status_of(item_id)) for item_id in ids])
+
+# ==================== PAGINATION ====================
+
+def model_projection(model) -> dict:
+    """Mongo projection returning only the fields of a response model"""
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+def list_response(docs: list, model, response: Response):
+    """Return `docs` for FastAPI to validate, or encode them directly when FAST_JSON_RESPONSES is on.
+
+    The fast path emits exactly the model's fields in the model's order, filling missing optional
+    fields with their defaults as validation would, so the response schema is unchanged.
+    """
+    if not FAST_JSON_RESPONSES:
+        return docs
+    fields = model.model_fields
+    content = [
+        {name: doc[name] if name in doc else field.get_default() for name, field in fields.items()}
+        for doc in docs
+    ]
+    return ORJSONResponse(content, headers=dict(response.headers))
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc["created_at"], doc["id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw)
+        # Well-formed base64 JSON that is not a [created_at, id] pair is just as invalid
+        if not isinstance(value, list) or len(value) != 2 or not all(isinstance(part, str) for part in value):
+            raise ValueError(cursor)
+        return value[0], value[1]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+async def paginate(collection, query: dict, response: Response, limit: int, cursor: Optional[str] = None, projection: Optional[dict] = None) -> list:
+    """Return one page sorted by (created_at, id) descending; the cursor of the next page goes in X-Next-Cursor"""
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = {"$and": [query, {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": last_id}},
+        ]}]}
+    docs = await collection.find(query, projection or {"_id": 0}) \
+        .sort([("created_at", DESCENDING), ("id", DESCENDING)]) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+    return docs
+
+# ==================== HTTP CACHING ====================
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred encoding among COMPRESSION_ENCODINGS that the client accepts, if any"""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in COMPRESSION_ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=4 if level is None else level)
+    return gzip.compress(data, compresslevel=6 if level is None else level)
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles with a long-lived Cache-Control policy, serving precompressed .br/.gz siblings when accepted"""
+
+    async def get_response(self, path: str, scope) -> Response:
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding and scope["method"] in ("GET", "HEAD"):
+            suffix = ".br" if encoding == "br" else ".gz"
+            full_path, stat_result = await asyncio.to_thread(self.lookup_path, path + suffix)
+            if stat_result and stat_module.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Type"] = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                response.headers["Content-Encoding"] = encoding
+                return response
+        return await super().get_response(path, scope)
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = UPLOADS_CACHE_CONTROL
+        # Any file may gain a .br/.gz sibling, so even identity responses must not be shared across encodings
+        response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip for JSON bodies of at least `minimum_size` bytes.
+
+    Only complete JSON bodies are compressed; streamed and already encoded responses pass through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] == "http.response.body" and start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=start["headers"])
+                body = message.get("body", b"")
+                is_json = headers.get("content-type", "").startswith("application/json")
+                if is_json:
+                    headers.add_vary_header("Accept-Encoding")
+                if (encoding and is_json and not message.get("more_body")
+                        and "content-encoding" not in headers and len(body) >= self.minimum_size):
+                    body = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {"type": "http.response.body", "body": body}
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+app.add_middleware(CompressionMiddleware)
+
+async def mark_changed(*collections: str):
+    """Record a write: bumps the collections' version counters (used in ETags) and drops cached stats"""
+    invalidate_stats()
+    event_broker.stats_changed()
+    await asyncio.gather(*(
+        db.collection_versions.update_one({"collection": name}, {"$inc": {"version": 1}}, upsert=True)
+        for name in collections
+    ))
+
+def make_etag(*parts) -> str:
+    return 'W/"' + hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" match
+    return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set the ETag on `response`; returns a 304 to send instead when the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    response.headers.update(headers)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return None
+
+async def check_collections_etag(request: Request, response: Response, *collections: str) -> Optional[Response]:
+    """Weak ETag from the collections' write versions and the query string"""
+    # Read with the same preference as the data it validates, so a lagging secondary cannot pair old data with a new tag
+    versions = await reader(request).collection_versions.find(
+        {"collection": {"$in": list(collections)}}, {"_id": 0}
+    ).to_list(len(collections))
+    by_name = {v["collection"]: v["version"] for v in versions}
+    etag = make_etag(request.url.path, str(request.url.query), [by_name.get(name, 0) for name in collections])
+    return conditional_response(request, response, etag)
+
+# ==================== RATE LIMITING ====================
+
+def parse_rate(rate: str) -> tuple:
+    """"N/S" -> (bucket capacity, tokens refilled per second)"""
+    count, seconds = rate.split("/")
+    return float(count), float(count) / float(seconds)
+
+class MemoryRateLimitBackend:
+    """Per-worker token buckets; the least recently used ones are dropped past RATE_LIMIT_MAX_KEYS"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+
+    async def take(self, key: str, capacity: float, refill: float) -> float:
+        """Take one token; returns 0 when allowed, else the seconds until a token is available"""
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        allowed = tokens >= 1
+        self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / refill
+
+class MongoRateLimitBackend:
+    """Buckets shared by all workers in the rate_limits collection, updated atomically in one round trip"""
+
+    async def take(self, key: str, capacity: float, refill: float) -> float:
+        now = time.time()
+        tokens = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [{"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}, refill]}
+        ]}]}
+        bucket = await db.rate_limits.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": tokens, "updated": now}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    # Idle buckets are full again after capacity / refill seconds; the TTL index removes them then
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=capacity / refill)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return 0.0 if bucket["allowed"] else (1 - bucket["tokens"]) / refill
+
+RATE_LIMIT_BACKENDS = {
+    "memory": MemoryRateLimitBackend,
+    "mongo": MongoRateLimitBackend,
+}
+
+class RateLimitMiddleware:
+    """Answers 429 with Retry-After once a client IP exhausts its bucket on one of RATE_LIMITED_ROUTES.
+
+    Other requests cost one dict lookup. A failing shared backend lets requests through.
+    """
+
+    def __init__(self, app, routes: dict = RATE_LIMITED_ROUTES, backend: str = RATE_LIMIT_BACKEND):
+        self.app = app
+        self.limits = {route: parse_rate(rate) for route, rate in routes.items()}
+        self.backend = RATE_LIMIT_BACKENDS[backend]()
+
+    def client_ip(self, scope) -> str:
+        if RATE_LIMIT_TRUST_FORWARDED:
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[-1].strip()
+        return scope["client"][0] if scope.get("client") else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        key = f"{self.client_ip(scope)}|{scope['method']} {scope['path']}"
+        try:
+            retry_after = await self.backend.take(key, *limit)
+        except PyMongoError as e:
+            logger.warning("Rate limit backend unavailable, request allowed: %s", e)
+            retry_after = 0.0
+        if retry_after > 0:
+            rate_limited_total.inc(scope["path"])
+            response = JSONResponse(
+                {"detail": "Trop de requêtes, veuillez réessayer plus tard"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+# Multipart framing (boundaries, part headers) around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# (method, path) -> (largest accepted request body, detail); the routes parse multipart bodies before they run
+BODY_LIMITED_ROUTES = {
+    ("POST", "/api/upload/image"): (MAX_FILE_SIZE + MULTIPART_OVERHEAD, "Fichier trop volumineux. Maximum 10MB."),
+    ("POST", "/api/upload/document"): (MAX_FILE_SIZE + MULTIPART_OVERHEAD, "Fichier trop volumineux. Maximum 10MB."),
+    ("POST", "/api/admin/import/members"): (MAX_IMPORT_SIZE + MULTIPART_OVERHEAD, "Fichier trop volumineux."),
+}
+
+class BodySizeLimitMiddleware:
+    """Answers 413 for oversized bodies on BODY_LIMITED_ROUTES before the form parser spools them.
+
+    A declared Content-Length over the limit is refused without reading anything; chunked bodies
+    are counted as they arrive and cut off as soon as they cross it.
+    """
+
+    def __init__(self, app, routes: dict = BODY_LIMITED_ROUTES):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        limit = self.routes.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        max_size, detail = limit
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_size:
+            response = JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    # Raised inside the route's body parsing, so the regular exception handler answers it
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(BodySizeLimitMiddleware)
+
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Added last so it is the outermost middleware: compressed and rate-limited responses get CORS headers too
+app.add_middleware(
+    CORSMiddleware,
+    allow_credentials=True,
+    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# ==================== NOTIFICATIONS ====================
+
+async def enqueue_notification(kind: str, subject_id: str, summary: dict):
+    """Queue a notification in the outbox; delivery happens later in the background worker.
+    Without a configured sink nothing would ever drain the outbox, so nothing is queued."""
+    if NOTIFY_SINK not in NOTIFICATION_SINKS:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    await db.notification_outbox.insert_one({
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "subject_id": subject_id,
+        "summary": summary,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "last_error": None,
+        "created_at": now
+    })
+
+NOTIFICATION_TITLES = {
+    "contact_message": "Nouveaux messages de contact",
+    "membership_application": "Nouvelles demandes d'adhésion",
+}
+
+def format_digest(entries: list) -> dict:
+    """Group outbox entries by kind into one digest: a subject line, a plain-text body and the raw entries"""
+    sections = []
+    for kind, title in NOTIFICATION_TITLES.items():
+        items = [entry for entry in entries if entry["kind"] == kind]
+        if items:
+            lines = [f"{title} ({len(items)})"]
+            for entry in items:
+                summary = entry["summary"]
+                detail = summary.get("subject") or summary.get("phone") or ""
+                lines.append(f"- {summary.get('name')} <{summary.get('email')}> {detail}".rstrip())
+            sections.append("\n".join(lines))
+    return {
+        "subject": f"Porte du Savoir : {len(entries)} nouvelle(s) notification(s)",
+        "text": "\n\n".join(sections),
+        "entries": [{k: entry[k] for k in ("id", "kind", "subject_id", "summary", "created_at")} for entry in entries],
+    }
+
+class FileNotificationSink:
+    """Appends each digest as one JSON line; meant for development and tests"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def send(self, digest: dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(digest, ensure_ascii=False) + "\n")
+
+class WebhookNotificationSink:
+    """POSTs each digest as JSON; any non-2xx answer counts as a failed delivery"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def send(self, digest: dict):
+        requests.post(self.url, json=digest, timeout=NOTIFY_TIMEOUT_SECONDS).raise_for_status()
+
+class SmtpNotificationSink:
+    """Emails each digest to NOTIFY_EMAIL_TO"""
+
+    def send(self, digest: dict):
+        message = EmailMessage()
+        message["Subject"] = digest["subject"]
+        message["From"] = NOTIFY_EMAIL_FROM
+        message["To"] = ", ".join(NOTIFY_EMAIL_TO)
+        message.set_content(digest["text"])
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=NOTIFY_TIMEOUT_SECONDS) as smtp:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_USER:
+                smtp.login(SMTP_USER, SMTP_PASSWORD)
+            smtp.send_message(message)
+
+NOTIFICATION_SINKS = {
+    "file": lambda: FileNotificationSink(NOTIFY_FILE_PATH),
+    "webhook": lambda: WebhookNotificationSink(NOTIFY_WEBHOOK_URL),
+    "smtp": SmtpNotificationSink,
+}
+
+def make_notification_sink():
+    """Sink selected by NOTIFY_SINK; None leaves entries pending in the outbox"""
+    if NOTIFY_SINK == "none":
+        return None
+    if NOTIFY_SINK not in NOTIFICATION_SINKS:
+        logger.error("Unknown NOTIFY_SINK %r, notifications stay in the outbox", NOTIFY_SINK)
+        return None
+    return NOTIFICATION_SINKS[NOTIFY_SINK]()
+
+def retry_delay(attempts: int) -> float:
+    return min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS)
+
+async def claim_outbox_batch() -> list:
+    """Lease up to OUTBOX_BATCH_SIZE due entries to this worker by pushing their next_attempt_at past the lease"""
+    now = datetime.now(timezone.utc)
+    due = {"status": {"$in": ["pending", "sending"]}, "next_attempt_at": {"$lte": now.isoformat()}}
+    candidates = await db.notification_outbox.find(due, {"_id": 0, "id": 1}) \
+        .sort("next_attempt_at", ASCENDING).limit(OUTBOX_BATCH_SIZE).to_list(OUTBOX_BATCH_SIZE)
+    if not candidates:
+        return []
+    claim_id = str(uuid.uuid4())
+    await db.notification_outbox.update_many(
+        {**due, "id": {"$in": [doc["id"] for doc in candidates]}},
+        {"$set": {
+            "status": "sending",
+            "claim_id": claim_id,
+            "next_attempt_at": (now + timedelta(seconds=OUTBOX_LEASE_SECONDS)).isoformat()
+        }}
+    )
+    return await db.notification_outbox.find({"claim_id": claim_id}, {"_id": 0}).to_list(None)
+
+async def deliver_outbox(sink) -> int:
+    """Send every due entry as one digest and record the outcome; returns the number of entries delivered"""
+    entries = await claim_outbox_batch()
+    if not entries:
+        return 0
+    now = datetime.now(timezone.utc)
+    try:
+        await asyncio.to_thread(sink.send, format_digest(entries))
+    except Exception as e:
+        logger.warning("Notification digest of %d entries failed: %s", len(entries), e)
+        updates = []
+        for entry in entries:
+            attempts = entry["attempts"] + 1
+            failed = attempts >= OUTBOX_MAX_ATTEMPTS
+            update = {
+                "status": "failed" if failed else "pending",
+                "attempts": attempts,
+                "last_error": str(e),
+                "next_attempt_at": (now + timedelta(seconds=retry_delay(attempts))).isoformat()
+            }
+            if failed:
+                update["expires_at"] = now + timedelta(seconds=OUTBOX_RETENTION_SECONDS)
+            updates.append(UpdateOne({"id": entry["id"]}, {"$set": update}))
+        await db.notification_outbox.bulk_write(updates, ordered=False)
+        return 0
+    await db.notification_outbox.update_many(
+        {"id": {"$in": [entry["id"] for entry in entries]}},
+        {"$set": {
+            "status": "sent",
+            "sent_at": now.isoformat(),
+            "last_error": None,
+            "expires_at": now + timedelta(seconds=OUTBOX_RETENTION_SECONDS)
+        }}
+    )
+    return len(entries)
+
+async def outbox_worker(sink):
+    """Background loop sending one digest per OUTBOX_DIGEST_SECONDS, draining backlogs larger than a batch"""
+    while True:
+        await asyncio.sleep(OUTBOX_DIGEST_SECONDS)
+        try:
+            while await deliver_outbox(sink) == OUTBOX_BATCH_SIZE:
+                pass
+        except PyMongoError as e:
+            logger.warning("Notification outbox unavailable: %s", e)
+
 # ==================== AUTH ROUTES ====================
 
 @api_router.post("/auth/register", response_model=TokenResponse)
@@ -234,13 +1461,14 @@ async def register(user_data: UserCreate):
         "id": user_id,
         "email": user_data.email,
         "name": user_data.name,
-        "password": hash_password(user_data.password),
+        "password": await hash_password_async(user_data.password),
         "role": "admin",
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.users.insert_one(user_doc)
+    invalidate_user_cache(user_id)
     
-    token = create_token(user_id, "admin")
+    token = create_token(user_id, "admin", user_data.email, user_data.name)
     return TokenResponse(
         access_token=token,
         user=UserResponse(id=user_id, email=user_data.email, name=user_data.name, role="admin")
@@ -249,10 +1477,10 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user or not await verify_password_async(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     
-    token = create_token(user["id"], user["role"])
+    token = create_token(user["id"], user["role"], user["email"], user["name"])
     return TokenResponse(
         access_token=token,
         user=UserResponse(id=user["id"], email=user["email"], name=user["name"], role=user["role"])
@@ -264,17 +1492,25 @@ async def get_me(user: dict = Depends(get_current_user)):
 
 # ==================== PROJECTS ROUTES ====================
 
-@api_router.get("/projects", response_model=List[ProjectResponse])
-async def get_projects(status: Optional[str] = None):
+@api_router.get("/projects", response_model=Union[List[ProjectResponse], List[ProjectSummary]])
+async def get_projects(request: Request, response: Response, status: Optional[str] = None, fields: Literal["summary", "full"] = "summary", limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    """List projects; objectives are only included with fields=full"""
+    not_modified = await check_collections_etag(request, response, "projects")
+    if not_modified:
+        return not_modified
     query = {}
     if status:
         query["status"] = status
-    projects = await db.projects.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return projects
+    model = ProjectResponse if fields == "full" else ProjectSummary
+    projects = await paginate(reader(request).projects, query, response, limit, cursor, model_projection(model))
+    return list_response(projects, model, response)
 
 @api_router.get("/projects/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: str):
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+async def get_project(project_id: str, request: Request, response: Response):
+    not_modified = await check_collections_etag(request, response, "projects")
+    if not_modified:
+        return not_modified
+    project = await reader(request).projects.find_one({"id": project_id}, {"_id": 0})
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
     return project
@@ -289,21 +1525,24 @@ async def create_project(project: ProjectCreate, user: dict = Depends(require_ad
         "updated_at": now
     }
     await db.projects.insert_one(project_doc)
-    result = await db.projects.find_one({"id": project_doc["id"]}, {"_id": 0})
-    return result
+    await mark_changed("projects")
+    return {k: v for k, v in project_doc.items() if k != "_id"}
 
 @api_router.put("/projects/{project_id}", response_model=ProjectResponse)
 async def update_project(project_id: str, project: ProjectCreate, user: dict = Depends(require_admin)):
-    existing = await db.projects.find_one({"id": project_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Projet non trouvé")
-    
     update_data = {
         **project.model_dump(),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.projects.update_one({"id": project_id}, {"$set": update_data})
-    updated = await db.projects.find_one({"id": project_id}, {"_id": 0})
+    updated = await db.projects.find_one_and_update(
+        {"id": project_id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+    await mark_changed("projects")
     return updated
 
 @api_router.delete("/projects/{project_id}")
@@ -311,23 +1550,32 @@ async def delete_project(project_id: str, user: dict = Depends(require_admin)):
     result = await db.projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
+    await mark_changed("projects")
     return {"message": "Projet supprimé"}
 
 # ==================== ARTICLES ROUTES ====================
 
-@api_router.get("/articles", response_model=List[ArticleResponse])
-async def get_articles(category: Optional[str] = None, published_only: bool = True):
+@api_router.get("/articles", response_model=Union[List[ArticleResponse], List[ArticleSummary]])
+async def get_articles(request: Request, response: Response, category: Optional[str] = None, published_only: bool = True, fields: Literal["summary", "full"] = "summary", limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    """List articles; the content body is only included with fields=full"""
+    not_modified = await check_collections_etag(request, response, "articles")
+    if not_modified:
+        return not_modified
     query = {}
     if category:
         query["category"] = category
     if published_only:
         query["published"] = True
-    articles = await db.articles.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return articles
+    model = ArticleResponse if fields == "full" else ArticleSummary
+    articles = await paginate(reader(request).articles, query, response, limit, cursor, model_projection(model))
+    return list_response(articles, model, response)
 
 @api_router.get("/articles/{article_id}", response_model=ArticleResponse)
-async def get_article(article_id: str):
-    article = await db.articles.find_one({"id": article_id}, {"_id": 0})
+async def get_article(article_id: str, request: Request, response: Response):
+    not_modified = await check_collections_etag(request, response, "articles")
+    if not_modified:
+        return not_modified
+    article = await reader(request).articles.find_one({"id": article_id}, {"_id": 0})
     if not article:
         raise HTTPException(status_code=404, detail="Article non trouvé")
     return article
@@ -342,20 +1590,24 @@ async def create_article(article: ArticleCreate, user: dict = Depends(require_ad
         "updated_at": now
     }
     await db.articles.insert_one(article_doc)
+    await mark_changed("articles")
     return {k: v for k, v in article_doc.items() if k != "_id"}
 
 @api_router.put("/articles/{article_id}", response_model=ArticleResponse)
 async def update_article(article_id: str, article: ArticleCreate, user: dict = Depends(require_admin)):
-    existing = await db.articles.find_one({"id": article_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Article non trouvé")
-    
     update_data = {
         **article.model_dump(),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.articles.update_one({"id": article_id}, {"$set": update_data})
-    updated = await db.articles.find_one({"id": article_id}, {"_id": 0})
+    updated = await db.articles.find_one_and_update(
+        {"id": article_id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Article non trouvé")
+    await mark_changed("articles")
     return updated
 
 @api_router.delete("/articles/{article_id}")
@@ -363,24 +1615,28 @@ async def delete_article(article_id: str, user: dict = Depends(require_admin)):
     result = await db.articles.delete_one({"id": article_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Article non trouvé")
+    await mark_changed("articles")
     return {"message": "Article supprimé"}
 
 # ==================== MEMBERS ROUTES ====================
 
 @api_router.get("/members", response_model=List[MemberResponse])
-async def get_members(approved_only: bool = True, member_type: Optional[str] = None):
+async def get_members(request: Request, response: Response, approved_only: bool = True, member_type: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    not_modified = await check_collections_etag(request, response, "members")
+    if not_modified:
+        return not_modified
     query = {}
     if approved_only:
         query["approved"] = True
     if member_type:
         query["member_type"] = member_type
-    members = await db.members.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return members
+    members = await paginate(reader(request).members, query, response, limit, cursor, model_projection(MemberResponse))
+    return list_response(members, MemberResponse, response)
 
 @api_router.get("/members/pending", response_model=List[MemberResponse])
-async def get_pending_members(user: dict = Depends(require_admin)):
-    members = await db.members.find({"approved": False}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return members
+async def get_pending_members(response: Response, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, user: dict = Depends(require_admin)):
+    members = await paginate(db.members, {"approved": False}, response, limit, cursor, model_projection(MemberResponse))
+    return list_response(members, MemberResponse, response)
 
 @api_router.post("/members/apply", response_model=MemberResponse)
 async def apply_membership(member: MemberCreate):
@@ -398,6 +1654,9 @@ async def apply_membership(member: MemberCreate):
         "updated_at": now
     }
     await db.members.insert_one(member_doc)
+    await enqueue_notification("membership_application", member_doc["id"], {"name": member.name, "email": member.email, "phone": member.phone})
+    await mark_changed("members")
+    event_broker.publish("member_applied", {"id": member_doc["id"], "name": member.name, "created_at": now})
     return {k: v for k, v in member_doc.items() if k != "_id"}
 
 @api_router.put("/members/{member_id}/approve")
@@ -408,6 +1667,8 @@ async def approve_member(member_id: str, member_type: str = "actif", user: dict
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Membre non trouvé")
+    await mark_changed("members")
+    event_broker.publish("member_approved", {"ids": [member_id]})
     return {"message": "Membre approuvé"}
 
 @api_router.put("/members/{member_id}/reject")
@@ -415,6 +1676,7 @@ async def reject_member(member_id: str, user: dict = Depends(require_admin)):
     result = await db.members.delete_one({"id": member_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Membre non trouvé")
+    await mark_changed("members")
     return {"message": "Demande rejetée"}
 
 @api_router.delete("/members/{member_id}")
@@ -422,13 +1684,11 @@ async def delete_member(member_id: str, user: dict = Depends(require_admin)):
     result = await db.members.delete_one({"id": member_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Membre non trouvé")
+    await mark_changed("members")
     return {"message": "Membre supprimé"}
 
-@api_router.post("/members", response_model=MemberResponse)
-async def create_member(member: MemberAdminCreate, user: dict = Depends(require_admin)):
-    """Admin creates a member directly (already approved)"""
-    now = datetime.now(timezone.utc).isoformat()
-    member_doc = {
+def new_member_doc(member: MemberAdminCreate, now: str) -> dict:
+    return {
         "id": str(uuid.uuid4()),
         "name": member.name,
         "email": member.email,
@@ -440,16 +1700,18 @@ async def create_member(member: MemberAdminCreate, user: dict = Depends(require_
         "created_at": now,
         "updated_at": now
     }
+
+@api_router.post("/members", response_model=MemberResponse)
+async def create_member(member: MemberAdminCreate, user: dict = Depends(require_admin)):
+    """Admin creates a member directly (already approved)"""
+    member_doc = new_member_doc(member, datetime.now(timezone.utc).isoformat())
     await db.members.insert_one(member_doc)
+    await mark_changed("members")
     return {k: v for k, v in member_doc.items() if k != "_id"}
 
 @api_router.put("/members/{member_id}")
 async def update_member(member_id: str, member: MemberAdminCreate, user: dict = Depends(require_admin)):
     """Admin updates a member"""
-    existing = await db.members.find_one({"id": member_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Membre non trouvé")
-    
     update_data = {
         "name": member.name,
         "email": member.email,
@@ -458,19 +1720,55 @@ async def update_member(member_id: str, member: MemberAdminCreate, user: dict =
         "bio": member.bio,
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.members.update_one({"id": member_id}, {"$set": update_data})
-    updated = await db.members.find_one({"id": member_id}, {"_id": 0})
+    updated = await db.members.find_one_and_update(
+        {"id": member_id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Membre non trouvé")
+    await mark_changed("members")
     return updated
 
+@api_router.post("/members/bulk/approve", response_model=BulkResponse)
+async def bulk_approve_members(batch: BulkApprove, user: dict = Depends(require_admin)):
+    """Approve many membership applications with a single update_many"""
+    ids = list(dict.fromkeys(batch.ids))
+    existing = await find_by_ids(db.members, ids, "approved")
+    pending = [i for i in ids if i in existing and not existing[i].get("approved")]
+    if pending:
+        # Members already approved keep their member_type
+        await db.members.update_many(
+            {"id": {"$in": pending}, "approved": False},
+            {"$set": {"approved": True, "member_type": batch.member_type, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        await mark_changed("members")
+        event_broker.publish("member_approved", {"ids": pending})
+    return bulk_response(ids, lambda i: "not_found" if i not in existing else "already_approved" if existing[i].get("approved") else "approved")
+
+@api_router.post("/members/bulk/reject", response_model=BulkResponse)
+async def bulk_reject_members(batch: BulkIds, user: dict = Depends(require_admin)):
+    """Reject (delete) many membership applications with a single delete_many"""
+    ids = list(dict.fromkeys(batch.ids))
+    existing = await find_by_ids(db.members, ids)
+    if existing:
+        await db.members.delete_many({"id": {"$in": list(existing)}})
+        await mark_changed("members")
+    return bulk_response(ids, lambda i: "rejected" if i in existing else "not_found")
+
 # ==================== DOCUMENTS ROUTES ====================
 
 @api_router.get("/documents", response_model=List[DocumentResponse])
-async def get_documents(category: Optional[str] = None):
+async def get_documents(request: Request, response: Response, category: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    not_modified = await check_collections_etag(request, response, "documents")
+    if not_modified:
+        return not_modified
     query = {}
     if category:
         query["category"] = category
-    documents = await db.documents.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return documents
+    documents = await paginate(reader(request).documents, query, response, limit, cursor, model_projection(DocumentResponse))
+    return list_response(documents, DocumentResponse, response)
 
 @api_router.post("/documents", response_model=DocumentResponse)
 async def create_document(document: DocumentCreate, user: dict = Depends(require_admin)):
@@ -480,6 +1778,7 @@ async def create_document(document: DocumentCreate, user: dict = Depends(require
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.documents.insert_one(doc)
+    await mark_changed("documents")
     return {k: v for k, v in doc.items() if k != "_id"}
 
 @api_router.delete("/documents/{document_id}")
@@ -487,14 +1786,15 @@ async def delete_document(document_id: str, user: dict = Depends(require_admin))
     result = await db.documents.delete_one({"id": document_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Document non trouvé")
+    await mark_changed("documents")
     return {"message": "Document supprimé"}
 
 # ==================== CONTACT ROUTES ====================
 
 @api_router.get("/contact", response_model=List[ContactMessageResponse])
-async def get_messages(user: dict = Depends(require_admin)):
-    messages = await db.contact_messages.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return messages
+async def get_messages(response: Response, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, user: dict = Depends(require_admin)):
+    messages = await paginate(db.contact_messages, {}, response, limit, cursor, model_projection(ContactMessageResponse))
+    return list_response(messages, ContactMessageResponse, response)
 
 @api_router.post("/contact")
 async def send_message(message: ContactMessageCreate):
@@ -505,6 +1805,9 @@ async def send_message(message: ContactMessageCreate):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.contact_messages.insert_one(msg_doc)
+    await enqueue_notification("contact_message", msg_doc["id"], {"name": message.name, "email": message.email, "subject": message.subject})
+    await mark_changed("contact_messages")
+    event_broker.publish("message_received", {"id": msg_doc["id"], "name": message.name, "subject": message.subject, "created_at": msg_doc["created_at"]})
     return {"message": "Message envoyé avec succès"}
 
 @api_router.put("/contact/{message_id}/read")
@@ -512,6 +1815,7 @@ async def mark_as_read(message_id: str, user: dict = Depends(require_admin)):
     result = await db.contact_messages.update_one({"id": message_id}, {"$set": {"read": True}})
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Message non trouvé")
+    await mark_changed("contact_messages")
     return {"message": "Marqué comme lu"}
 
 @api_router.delete("/contact/{message_id}")
@@ -519,21 +1823,83 @@ async def delete_message(message_id: str, user: dict = Depends(require_admin)):
     result = await db.contact_messages.delete_one({"id": message_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Message non trouvé")
+    await mark_changed("contact_messages")
     return {"message": "Message supprimé"}
 
+@api_router.post("/contact/bulk/read", response_model=BulkResponse)
+async def bulk_mark_as_read(batch: BulkIds, user: dict = Depends(require_admin)):
+    ids = list(dict.fromkeys(batch.ids))
+    existing = await find_by_ids(db.contact_messages, ids, "read")
+    unread = [i for i, doc in existing.items() if not doc.get("read")]
+    if unread:
+        await db.contact_messages.update_many({"id": {"$in": unread}}, {"$set": {"read": True}})
+        await mark_changed("contact_messages")
+    return bulk_response(ids, lambda i: "not_found" if i not in existing else "already_read" if existing[i].get("read") else "read")
+
+@api_router.post("/contact/bulk/delete", response_model=BulkResponse)
+async def bulk_delete_messages(batch: BulkIds, user: dict = Depends(require_admin)):
+    ids = list(dict.fromkeys(batch.ids))
+    existing = await find_by_ids(db.contact_messages, ids)
+    if existing:
+        await db.contact_messages.delete_many({"id": {"$in": list(existing)}})
+        await mark_changed("contact_messages")
+    return bulk_response(ids, lambda i: "deleted" if i in existing else "not_found")
+
 # ==================== SITE CONTENT ROUTES ====================
 
+class SiteContentSnapshot:
+    """The whole site_content collection held in memory, reloaded when its version stamp changes"""
+
+    def __init__(self):
+        self.items = {}
+        self.version = None
+
+    async def load(self):
+        # Read the stamp first: a write landing in between only causes one extra reload
+        stamp = await db.collection_versions.find_one({"collection": "site_content"}, {"_id": 0})
+        docs = await db.site_content.find({}, {"_id": 0}).to_list(None)
+        self.items = {doc["key"]: doc["value"] for doc in docs}
+        self.version = stamp["version"] if stamp else 0
+
+    async def refresh(self):
+        stamp = await db.collection_versions.find_one({"collection": "site_content"}, {"_id": 0})
+        if (stamp["version"] if stamp else 0) != self.version:
+            await self.load()
+
+    async def watch(self):
+        """Background loop keeping this worker's snapshot in line with writes from other workers"""
+        while True:
+            await asyncio.sleep(CONTENT_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except PyMongoError as e:
+                logger.warning("Site content refresh failed: %s", e)
+
+    async def get(self) -> dict:
+        if self.version is None:
+            await self.load()
+        return self.items
+
+site_content_snapshot = SiteContentSnapshot()
+
+def check_content_etag(request: Request, response: Response) -> Optional[Response]:
+    return conditional_response(request, response, make_etag(request.url.path, site_content_snapshot.version))
+
 @api_router.get("/content", response_model=List[SiteContentResponse])
-async def get_all_content():
-    content = await db.site_content.find({}, {"_id": 0}).to_list(100)
-    return content
+async def get_all_content(request: Request, response: Response):
+    items = await site_content_snapshot.get()
+    not_modified = check_content_etag(request, response)
+    if not_modified:
+        return not_modified
+    return [{"key": key, "value": value} for key, value in items.items()]
 
 @api_router.get("/content/{key}")
-async def get_content(key: str):
-    content = await db.site_content.find_one({"key": key}, {"_id": 0})
-    if not content:
-        return {"key": key, "value": ""}
-    return content
+async def get_content(key: str, request: Request, response: Response):
+    items = await site_content_snapshot.get()
+    not_modified = check_content_etag(request, response)
+    if not_modified:
+        return not_modified
+    return {"key": key, "value": items.get(key, "")}
 
 @api_router.put("/content")
 async def update_content(content: SiteContentUpdate, user: dict = Depends(require_admin)):
@@ -542,86 +1908,472 @@ async def update_content(content: SiteContentUpdate, user: dict = Depends(requir
         {"$set": {"key": content.key, "value": content.value}},
         upsert=True
     )
+    await mark_changed("site_content")
+    await site_content_snapshot.load()
+    event_broker.publish("content_updated", {"keys": [content.key]})
     return {"message": "Contenu mis à jour"}
 
+@api_router.put("/content/bulk", response_model=BulkResponse)
+async def bulk_update_content(batch: BulkContentUpdate, user: dict = Depends(require_admin)):
+    """Upsert many site content keys with a single bulk_write"""
+    # The last value wins when a key is repeated
+    values = {item.key: item.value for item in batch.items}
+    keys = list(values)
+    result = await db.site_content.bulk_write(
+        [UpdateOne({"key": key}, {"$set": {"key": key, "value": value}}, upsert=True) for key, value in values.items()],
+        ordered=False
+    )
+    created = {keys[index] for index in result.upserted_ids}
+    await mark_changed("site_content")
+    await site_content_snapshot.load()
+    event_broker.publish("content_updated", {"keys": keys})
+    return bulk_response(keys, lambda key: "created" if key in created else "updated")
+
 # ==================== STATS ROUTES ====================
 
+stats_cache = TTLCache(STATS_CACHE_TTL_SECONDS, 1)
+
+def invalidate_stats():
+    """Called by every route that changes a count shown on /stats or /admin/stats"""
+    stats_cache.clear()
+
+async def get_counts(fresh: bool = False) -> dict:
+    """All dashboard counts, fetched concurrently; `fresh` bypasses the cache and refreshes it.
+    Totals come from collection metadata and every filtered count is answered from an index,
+    so no count reads the documents themselves."""
+    if not fresh:
+        cached = stats_cache.get("counts")
+        if cached is not None:
+            return cached
+    projects, articles, published, members, pending, messages, unread = await asyncio.gather(
+        db.projects.estimated_document_count(),
+        db.articles.estimated_document_count(),
+        db.articles.count_documents({"published": True}),
+        db.members.count_documents({"approved": True}),
+        db.members.count_documents({"approved": False}),
+        db.contact_messages.estimated_document_count(),
+        db.contact_messages.count_documents({"read": False}),
+    )
+    counts = {
+        "projects": projects,
+        "articles": articles,
+        "published_articles": published,
+        "members": members,
+        "pending_members": pending,
+        "messages": messages,
+        "unread_messages": unread,
+    }
+    stats_cache.set("counts", counts)
+    return counts
+
 @api_router.get("/stats", response_model=StatsResponse)
-async def get_stats():
-    projects_count = await db.projects.count_documents({})
-    articles_count = await db.articles.count_documents({"published": True})
-    members_count = await db.members.count_documents({"approved": True})
-    messages_count = await db.contact_messages.count_documents({"read": False})
+async def get_stats(request: Request, response: Response):
+    counts = await get_counts()
+    # Counts may come from this worker's cache, so the ETag is derived from the counts themselves
+    not_modified = conditional_response(request, response, make_etag(counts))
+    if not_modified:
+        return not_modified
     return StatsResponse(
-        projects_count=projects_count,
-        articles_count=articles_count,
-        members_count=members_count,
-        messages_count=messages_count
+        projects_count=counts["projects"],
+        articles_count=counts["published_articles"],
+        members_count=counts["members"],
+        messages_count=counts["unread_messages"]
     )
 
+def admin_counts(counts: dict) -> dict:
+    return {key: counts[key] for key in ("projects", "articles", "members", "pending_members", "messages", "unread_messages")}
+
+@api_router.get("/admin/db/pool")
+async def get_pool_metrics(user: dict = Depends(require_admin)):
+    """Connection pool utilization of this worker"""
+    return pool_metrics.snapshot()
+
 @api_router.get("/admin/stats")
 async def get_admin_stats(user: dict = Depends(require_admin)):
-    projects_count = await db.projects.count_documents({})
-    articles_count = await db.articles.count_documents({})
-    members_count = await db.members.count_documents({"approved": True})
-    pending_members = await db.members.count_documents({"approved": False})
-    messages_count = await db.contact_messages.count_documents({})
-    unread_messages = await db.contact_messages.count_documents({"read": False})
-    
-    return {
-        "projects": projects_count,
-        "articles": articles_count,
-        "members": members_count,
-        "pending_members": pending_members,
-        "messages": messages_count,
-        "unread_messages": unread_messages
+    # Admins always get exact numbers, and the public cache is refreshed as a side effect
+    return admin_counts(await get_counts(fresh=True))
+
+# ==================== ADMIN EVENTS ====================
+
+class EventBroker:
+    """In-process fan-out of admin events to every open /admin/events stream of this worker.
+
+    Each subscriber gets a bounded queue; one that falls behind is sent a `resync` event instead
+    of the events it missed. Writes also schedule a `stats` event, coalesced over
+    EVENTS_STATS_DEBOUNCE_SECONDS so a burst of writes costs one round of counts.
+
+    Writes on other workers only reach this one through the collection_versions stamps, polled
+    every `poll_seconds` while anyone listens: their `stats` arrive late, and their
+    member/message events are not relayed.
+    """
+
+    def __init__(self, poll_seconds: float = EVENTS_POLL_SECONDS):
+        self.subscribers = set()
+        self.sequence = 0
+        self.stats_dirty = asyncio.Event()
+        self.poll_seconds = poll_seconds
+        self.versions = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event: str, data: dict):
+        self.sequence += 1
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait((self.sequence, event, data))
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((self.sequence, "resync", {}))
+
+    def stats_changed(self):
+        if self.subscribers:
+            self.stats_dirty.set()
+
+    async def watch_stats(self):
+        """Background loop publishing fresh dashboard counts after writes, while anyone listens"""
+        while True:
+            await self.stats_dirty.wait()
+            await asyncio.sleep(EVENTS_STATS_DEBOUNCE_SECONDS)
+            self.stats_dirty.clear()
+            if not self.subscribers:
+                continue
+            try:
+                # Stamps first: a write landing in between only causes one extra round of counts
+                self.versions = await load_versions(STATS_COLLECTIONS)
+                self.publish("stats", admin_counts(await get_counts(fresh=True)))
+            except PyMongoError as e:
+                logger.warning("Admin stats refresh failed: %s", e)
+
+    async def watch_versions(self):
+        """Background loop scheduling a `stats` event when another worker wrote to a counted collection"""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            if not self.subscribers:
+                continue
+            try:
+                if await load_versions(STATS_COLLECTIONS) != self.versions:
+                    self.stats_dirty.set()
+            except PyMongoError as e:
+                logger.warning("Admin events version poll failed: %s", e)
+
+# Collections behind the dashboard counts
+STATS_COLLECTIONS = ["projects", "articles", "members", "contact_messages"]
+
+async def load_versions(collections: list) -> dict:
+    stamps = await db.collection_versions.find({"collection": {"$in": collections}}, {"_id": 0}).to_list(len(collections))
+    return {stamp["collection"]: stamp["version"] for stamp in stamps}
+
+event_broker = EventBroker()
+
+def format_event(event_id: int, event: str, data: dict) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+async def event_stream(queue: asyncio.Queue, expires_at: Optional[float]):
+    try:
+        # Current counts first, so a (re)connecting dashboard needs no separate /admin/stats call
+        yield b"retry: 5000\n\n" + format_event(event_broker.sequence, "stats", admin_counts(await get_counts()))
+        while expires_at is None or time.time() < expires_at:
+            timeout = EVENTS_KEEPALIVE_SECONDS if expires_at is None else min(EVENTS_KEEPALIVE_SECONDS, max(expires_at - time.time(), 0))
+            try:
+                yield format_event(*await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+        # Otherwise the browser would silently reconnect for a session that just expired
+        yield format_event(event_broker.sequence, "expired", {})
+    finally:
+        event_broker.unsubscribe(queue)
+
+def create_events_ticket(user: dict, session_exp: Optional[float]) -> str:
+    payload = {
+        "sub": user["id"],
+        "role": user["role"],
+        "email": user.get("email"),
+        "name": user.get("name"),
+        "aud": EVENTS_TICKET_AUDIENCE,
+        "session_exp": session_exp,
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=EVENTS_TICKET_SECONDS)
     }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+@api_router.post("/admin/events/ticket")
+async def admin_events_ticket(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Short-lived ticket for opening /admin/events; streams opened with it end when the session does"""
+    user = await require_admin(await authenticate(credentials.credentials))
+    session_exp = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM]).get("exp")
+    return {"ticket": create_events_ticket(user, session_exp), "expires_in": EVENTS_TICKET_SECONDS}
+
+@api_router.get("/admin/events")
+async def admin_events(ticket: str):
+    """Server-sent events for the admin dashboard.
+
+    EventSource cannot send an Authorization header, and its URL is written to access logs, so the
+    stream is opened with a ticket from POST /admin/events/ticket rather than the session token.
+    Sessions are not refreshed: when the one behind the ticket expires the stream sends an
+    `expired` event and ends, and the dashboard sends the admin back to the login page.
+    """
+    user = await require_admin(await authenticate(ticket, audience=EVENTS_TICKET_AUDIENCE))
+    expires_at = jwt.decode(ticket, JWT_SECRET, algorithms=[JWT_ALGORITHM], audience=EVENTS_TICKET_AUDIENCE).get("session_exp")
+    return StreamingResponse(
+        event_stream(event_broker.subscribe(), expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ==================== SEARCH ROUTES ====================
+
+# Searched collections: public filter, and text fields in the order a snippet is taken from
+SEARCH_SOURCES = {
+    "article": ("articles", {"published": True}, ["excerpt", "content", "title"]),
+    "project": ("projects", {}, ["description", "objectives", "title"]),
+    "document": ("documents", {}, ["description", "title"]),
+}
+
+def fold(text: str) -> str:
+    """Lower-case, accent-free copy of `text` with the same length, so positions map back to the original"""
+    folded = []
+    for ch in text:
+        base = unicodedata.normalize("NFD", ch)[0]
+        lower = base.lower()
+        folded.append(lower if len(lower) == 1 else base)
+    return "".join(folded)
+
+def search_terms(query: str) -> list:
+    """Folded query words, with plural endings dropped so they also match singular forms"""
+    terms = []
+    for word in re.findall(r"\w+", fold(query)):
+        if len(word) > 3 and word[-1] in "sx":
+            word = word[:-1]
+        if len(word) >= 2 and word not in terms:
+            terms.append(word)
+    return terms
+
+def make_snippet(text: str, terms: list) -> Optional[str]:
+    """Window of `text` around its first match, HTML-escaped, with every matched word wrapped in <mark>"""
+    if not terms:
+        return None
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\w*")
+    folded = fold(text)
+    first = pattern.search(folded)
+    if not first:
+        return None
+    start = max(0, first.start() - SNIPPET_LENGTH // 3)
+    if start > 0:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < first.start() else start
+    end = min(len(text), start + SNIPPET_LENGTH)
+    parts = ["…" if start > 0 else ""]
+    position = start
+    for match in pattern.finditer(folded, start, end):
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(text[match.start():match.end()])}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+    parts.append("…" if end < len(text) else "")
+    return "".join(parts)
+
+async def search_source(kind: str, query: str, limit: int) -> list:
+    collection_name, public_filter, fields = SEARCH_SOURCES[kind]
+    projection = {"_id": 0, "score": {"$meta": "textScore"}, "id": 1, "title": 1, "image_url": 1, "file_url": 1, "created_at": 1}
+    projection.update({field: 1 for field in fields})
+    docs = await read_db[collection_name].find({"$text": {"$search": query}, **public_filter}, projection) \
+        .sort([("score", {"$meta": "textScore"})]) \
+        .limit(limit) \
+        .to_list(limit)
+    terms = search_terms(query)
+    results = []
+    for doc in docs:
+        snippets = (make_snippet(doc.get(field) or "", terms) for field in fields)
+        snippet = next((s for s in snippets if s), html.escape((doc.get(fields[0]) or "")[:SNIPPET_LENGTH]))
+        results.append({**doc, "type": kind, "snippet": snippet})
+    return results
+
+@api_router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    types: Optional[str] = Query(None, description="Comma-separated subset of article, project, document"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=50),
+):
+    """Ranked full-text search over published articles, projects and documents (accent-insensitive, French stemming)"""
+    kinds = [kind.strip() for kind in types.split(",")] if types else list(SEARCH_SOURCES)
+    if any(kind not in SEARCH_SOURCES for kind in kinds):
+        raise HTTPException(status_code=400, detail="Type de recherche invalide")
+    # Each source returns its best page * limit + 1 hits; the merged ranking is then sliced
+    depth = page * limit + 1
+    if depth > SEARCH_MAX_RESULTS + 1:
+        raise HTTPException(status_code=400, detail="Page de résultats trop éloignée")
+    per_source = await asyncio.gather(*(search_source(kind, q, depth) for kind in kinds))
+    ranked = sorted((hit for hits in per_source for hit in hits), key=lambda hit: hit["score"], reverse=True)
+    offset = (page - 1) * limit
+    return SearchResponse(
+        query=q,
+        results=ranked[offset:offset + limit],
+        next_page=page + 1 if len(ranked) > offset + limit else None
+    )
 
 # ==================== UPLOAD ROUTES ====================
 
+def upload_extension(filename: str, default: str) -> str:
+    """Lower-case alphanumeric extension of a client filename"""
+    ext = filename.rsplit(".", 1)[-1].lower() if filename and "." in filename else ""
+    return ext if re.fullmatch(r"[a-z0-9]{1,10}", ext) else default
+
+# One lock per stored file while this worker renames it into place or unlinks it; dropped once unused
+upload_locks = weakref.WeakValueDictionary()
+
+def upload_lock(key: str) -> asyncio.Lock:
+    """Serializes saving and deleting the same content-hash file, so a delete never unlinks a copy that was just re-referenced"""
+    lock = upload_locks.get(key)
+    if lock is None:
+        lock = upload_locks[key] = asyncio.Lock()
+    return lock
+
+async def add_upload_ref(key: str, size: int):
+    await db.uploads.update_one(
+        {"key": key},
+        {"$inc": {"refs": 1}, "$setOnInsert": {"size": size, "created_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
+
+async def release_upload_ref(key: str) -> Optional[bool]:
+    """Drop one reference; True when the last one is gone, None for files stored before reference counting"""
+    record = await db.uploads.find_one_and_update(
+        {"key": key, "refs": {"$gt": 0}},
+        {"$inc": {"refs": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if record is None:
+        return None
+    if record["refs"] > 0:
+        return False
+    result = await db.uploads.delete_one({"key": key, "refs": {"$lte": 0}})
+    return result.deleted_count == 1
+
+async def save_upload(file: UploadFile, target_dir: Path, ext: str) -> tuple:
+    """Stream an upload to disk chunk by chunk; bodies over the limit are already refused by BodySizeLimitMiddleware.
+
+    Files are stored under the SHA-256 of their content, so re-uploading the same bytes
+    only adds a reference. Returns (filename, size, is_new).
+    """
+    tmp_path = UPLOAD_TMP_DIR / f"{uuid.uuid4()}.part"
+    size = 0
+    digest = hashlib.sha256()
+    f = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail="Fichier trop volumineux. Maximum 10MB.")
+            digest.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+        await asyncio.to_thread(f.close)
+        filename = f"{digest.hexdigest()}.{ext}"
+        target = target_dir / filename
+        key = f"{target_dir.name}/{filename}"
+        async with upload_lock(key):
+            is_new = not target.exists()
+            # Same name means same bytes, so replacing an existing copy is harmless.
+            # The reference is only taken once the file is in place: a failed rename leaves none behind.
+            await asyncio.to_thread(os.replace, tmp_path, target)
+            await add_upload_ref(key, size)
+        upload_bytes_total.inc(target_dir.name, amount=size)
+        uploads_total.inc(target_dir.name)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return filename, size, is_new
+
+def precompress_file(filepath: Path):
+    """Write .br/.gz siblings of an uploaded document when they are meaningfully smaller; runs as a background task"""
+    try:
+        data = filepath.read_bytes()
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding not in COMPRESSION_ENCODINGS:
+                continue
+            # Done once per file, so use the strongest settings
+            compressed = compress(data, encoding, level=11 if encoding == "br" else 9)
+            if len(compressed) > len(data) * 0.9:
+                continue
+            tmp_path = UPLOAD_TMP_DIR / f"{uuid.uuid4()}.part"
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, filepath.with_name(filepath.name + suffix))
+    except OSError as e:
+        logger.warning("Precompression failed for %s: %s", filepath.name, e)
+
+def image_derivative_name(filename: str, width: int, fmt: str) -> str:
+    return f"{filename.rsplit('.', 1)[0]}_w{width}.{fmt}"
+
+def image_derivatives(filename: str, content_type: str) -> list:
+    """Derivatives that will be generated for an uploaded image (animated GIFs are left alone)"""
+    if not IMAGE_DERIVATIVE_FORMATS or content_type == "image/gif":
+        return []
+    return [
+        {"width": width, "format": fmt, "url": f"/uploads/images/{image_derivative_name(filename, width, fmt)}"}
+        for width in IMAGE_DERIVATIVE_WIDTHS
+        for fmt in IMAGE_DERIVATIVE_FORMATS
+    ]
+
+def generate_image_derivatives(filepath: Path, derivatives: list):
+    """Write resized WebP/AVIF copies next to the original; runs as a background task"""
+    try:
+        with Image.open(filepath) as original:
+            img = ImageOps.exif_transpose(original)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info or "A" in img.getbands() else "RGB")
+            resized = {}
+            for derivative in derivatives:
+                # Never upscale: widths above the original just get the original size
+                width = min(derivative["width"], img.width)
+                if width not in resized:
+                    height = max(1, round(img.height * width / img.width))
+                    resized[width] = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+                tmp_path = UPLOAD_TMP_DIR / f"{uuid.uuid4()}.part"
+                resized[width].save(tmp_path, format=derivative["format"].upper(), quality=IMAGE_DERIVATIVE_QUALITY)
+                os.replace(tmp_path, IMAGES_DIR / derivative["url"].rsplit("/", 1)[-1])
+    except Exception as e:
+        logger.warning("Image derivatives failed for %s: %s", filepath.name, e)
+
 @api_router.post("/upload/image")
-async def upload_image(file: UploadFile = File(...), user: dict = Depends(require_admin)):
+async def upload_image(background_tasks: BackgroundTasks, file: UploadFile = File(...), user: dict = Depends(require_admin)):
     """Upload an image file"""
     if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Type de fichier non autorisé. Utilisez JPG, PNG, WebP ou GIF.")
     
-    # Check file size
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="Fichier trop volumineux. Maximum 10MB.")
-    
-    # Generate unique filename
-    ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{uuid.uuid4()}.{ext}"
+    # Save file under its content hash (size is checked while streaming)
+    ext = upload_extension(file.filename, "jpg")
+    filename, _, is_new = await save_upload(file, IMAGES_DIR, ext)
     filepath = IMAGES_DIR / filename
     
-    # Save file
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # Resized copies are generated after the response is sent, unless an identical upload already has them
+    derivatives = image_derivatives(filename, file.content_type)
+    missing = [d for d in derivatives if is_new or not (IMAGES_DIR / d["url"].rsplit("/", 1)[-1]).exists()]
+    if missing:
+        background_tasks.add_task(generate_image_derivatives, filepath, missing)
     
     # Return URL
-    return {"url": f"/uploads/images/{filename}", "filename": filename}
+    return {"url": f"/uploads/images/{filename}", "filename": filename, "derivatives": derivatives}
 
 @api_router.post("/upload/document")
-async def upload_document(file: UploadFile = File(...), user: dict = Depends(require_admin)):
+async def upload_document(background_tasks: BackgroundTasks, file: UploadFile = File(...), user: dict = Depends(require_admin)):
     """Upload a document file (PDF, DOC)"""
     if file.content_type not in ALLOWED_DOC_TYPES:
         raise HTTPException(status_code=400, detail="Type de fichier non autorisé. Utilisez PDF ou DOC.")
     
-    # Check file size
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="Fichier trop volumineux. Maximum 10MB.")
+    # Save file under its content hash (size is checked while streaming)
+    ext = upload_extension(file.filename, "pdf")
+    filename, _, is_new = await save_upload(file, DOCUMENTS_DIR, ext)
     
-    # Generate unique filename while keeping original name info
-    original_name = file.filename.rsplit(".", 1)[0] if "." in file.filename else file.filename
-    ext = file.filename.split(".")[-1] if "." in file.filename else "pdf"
-    filename = f"{uuid.uuid4()}_{original_name[:30]}.{ext}"
-    filepath = DOCUMENTS_DIR / filename
-    
-    # Save file
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # Compressible formats get .br/.gz siblings so they are never compressed per request
+    if is_new and file.content_type in PRECOMPRESSED_TYPES:
+        background_tasks.add_task(precompress_file, DOCUMENTS_DIR / filename)
     
     # Return URL
     return {"url": f"/uploads/documents/{filename}", "filename": filename}
@@ -636,10 +2388,143 @@ async def delete_upload(file_type: str, filename: str, user: dict = Depends(requ
     else:
         raise HTTPException(status_code=400, detail="Type de fichier invalide")
     
-    if filepath.exists():
+    if filepath.parent != (UPLOAD_DIR / file_type):
+        raise HTTPException(status_code=404, detail="Fichier non trouvé")
+    
+    key = f"{file_type}/{filename}"
+    # Releasing the last reference and unlinking happen under the same lock as save_upload's
+    # rename and new reference, so an identical upload cannot slip in between the two
+    async with upload_lock(key):
+        if not filepath.exists():
+            raise HTTPException(status_code=404, detail="Fichier non trouvé")
+        # Shared files are only unlinked when their last reference is released
+        last_ref = await release_upload_ref(key)
+        if last_ref is False:
+            return {"message": "Fichier supprimé"}
+        
         os.remove(filepath)
-        return {"message": "Fichier supprimé"}
-    raise HTTPException(status_code=404, detail="Fichier non trouvé")
+        for suffix in (".br", ".gz"):
+            filepath.with_name(filepath.name + suffix).unlink(missing_ok=True)
+        if file_type == "images":
+            for derivative in IMAGES_DIR.glob(f"{glob.escape(filepath.stem)}_w*.*"):
+                derivative.unlink(missing_ok=True)
+    return {"message": "Fichier supprimé"}
+
+# ==================== IMPORT / EXPORT ROUTES ====================
+
+EXPORTS = {
+    "members": ("members", MemberResponse, "membres"),
+    "contact": ("contact_messages", ContactMessageResponse, "messages"),
+}
+
+# Spreadsheets evaluate cells starting with these as formulas (e.g. =HYPERLINK(...) in a contact message)
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def csv_cell(value):
+    """Quote formula-like text with a leading ' so spreadsheets show it as typed instead of running it"""
+    if value is None:
+        return ""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def csv_uncell(value: str) -> str:
+    """Undo csv_cell so an exported roster imports back unchanged"""
+    if value.startswith("'") and value[1:].startswith(CSV_FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+async def export_rows(collection_name: str, model, export_format: str):
+    """Encode a whole collection batch by batch straight from the cursor"""
+    fields = list(model.model_fields)
+    cursor = db[collection_name].find({}, model_projection(model)) \
+        .sort([("created_at", ASCENDING), ("id", ASCENDING)]) \
+        .batch_size(EXPORT_BATCH_SIZE)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(fields)
+    count = 0
+    async for doc in cursor:
+        if export_format == "csv":
+            writer.writerow([csv_cell(doc.get(field)) for field in fields])
+        else:
+            buffer.write(json.dumps({field: doc.get(field) for field in fields}, ensure_ascii=False) + "\n")
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+@api_router.get("/admin/export/{collection}")
+async def export_collection(collection: Literal["members", "contact"], format: Literal["csv", "ndjson"] = "csv", user: dict = Depends(require_admin)):
+    """Stream the whole member roster or contact inbox as CSV or NDJSON"""
+    collection_name, model, basename = EXPORTS[collection]
+    filename = f"{basename}-{datetime.now(timezone.utc).strftime('%Y%m%d')}.{format}"
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_rows(collection_name, model, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def validate_member_row(row: dict) -> MemberAdminCreate:
+    fields = {key.strip().lower(): csv_uncell((value or "").strip()) for key, value in row.items() if key}
+    data = {name: fields[name] for name in MemberAdminCreate.model_fields if fields.get(name)}
+    return MemberAdminCreate(**data)
+
+async def insert_member_batch(docs: list, rows: list, errors: list) -> int:
+    """insert_many one batch; rows rejected by Mongo are added to `errors`"""
+    if not docs:
+        return 0
+    try:
+        result = await db.members.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            errors.append(ImportRowError(row=rows[write_error["index"]], errors=[write_error.get("errmsg", "Erreur d'insertion")]))
+        return e.details.get("nInserted", 0)
+
+@api_router.post("/admin/import/members", response_model=ImportReport)
+async def import_members(file: UploadFile = File(...), user: dict = Depends(require_admin)):
+    """Import approved members from a CSV with name, email, phone[, member_type, bio] columns"""
+    if upload_extension(file.filename, "") != "csv":
+        raise HTTPException(status_code=400, detail="Type de fichier non autorisé. Utilisez un fichier CSV.")
+    if file.size is not None and file.size > MAX_IMPORT_SIZE:
+        raise HTTPException(status_code=413, detail="Fichier trop volumineux.")
+    
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    now = datetime.now(timezone.utc).isoformat()
+    total = imported = 0
+    errors = []
+    try:
+        while True:
+            # Parsing is blocking file I/O, so each chunk is read on a worker thread
+            chunk = await asyncio.to_thread(lambda: list(islice(reader, IMPORT_BATCH_SIZE)))
+            if not chunk:
+                break
+            docs, rows = [], []
+            for row in chunk:
+                total += 1
+                line = total + 1
+                try:
+                    docs.append(new_member_doc(validate_member_row(row), now))
+                    rows.append(line)
+                except ValidationError as e:
+                    errors.append(ImportRowError(row=line, errors=[
+                        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+                    ]))
+            imported += await insert_member_batch(docs, rows, errors)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Fichier CSV illisible: {e}")
+    finally:
+        text.detach()
+    
+    if imported:
+        await mark_changed("members")
+    return ImportReport(rows=total, imported=imported, errors=errors)
 
 # ==================== SEED DATA ====================
 
@@ -778,14 +2663,91 @@ async def seed_data():
             "id": str(uuid.uuid4()),
             "email": "admin@portedusavoir.org",
             "name": "Administrateur",
-            "password": hash_password("Admin123!"),
+            "password": await hash_password_async("Admin123!"),
             "role": "admin",
             "created_at": now
         }
         await db.users.insert_one(admin)
+        invalidate_user_cache(admin["id"])
+    
+    await mark_changed("projects", "articles", "members", "site_content")
+    await site_content_snapshot.load()
     
     return {"message": "Données de démonstration créées avec succès", "admin_email": "admin@portedusavoir.org", "admin_password": "Admin123!"}
 
+# ==================== DATABASE INDEXES ====================
+
+# One index per query shape used by the routes above: unique `id` lookups plus every filter + (created_at, id) sort pair
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "projects": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("title", TEXT), ("description", TEXT), ("objectives", TEXT)], weights={"title": 10, "description": 2, "objectives": 1},
+                   default_language="french", name="search_text"),
+    ],
+    "articles": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("published", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="published_created_at_id"),
+        IndexModel([("category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="category_created_at_id"),
+        IndexModel([("published", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="published_category_created_at_id"),
+        IndexModel([("title", TEXT), ("excerpt", TEXT), ("content", TEXT)], weights={"title": 10, "excerpt": 4, "content": 1},
+                   default_language="french", name="search_text"),
+    ],
+    "members": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("approved", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="approved_created_at_id"),
+        IndexModel([("member_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="member_type_created_at_id"),
+        IndexModel([("approved", ASCENDING), ("member_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="approved_member_type_created_at_id"),
+    ],
+    "documents": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="category_created_at_id"),
+        IndexModel([("title", TEXT), ("description", TEXT)], weights={"title": 10, "description": 2},
+                   default_language="french", name="search_text"),
+    ],
+    "contact_messages": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("read", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="read_created_at_id"),
+    ],
+    "site_content": [
+        IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+    ],
+    "uploads": [
+        IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+    ],
+    "notification_outbox": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("claim_id", ASCENDING)], sparse=True, name="claim_id"),
+        # Only sent and failed entries carry expires_at; pending ones are never expired
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    "collection_versions": [
+        IndexModel([("collection", ASCENDING)], unique=True, name="collection_unique"),
+    ],
+}
+
+async def ensure_indexes():
+    """Create the indexes above; a failing collection is logged and does not block startup"""
+    for collection_name, indexes in INDEXES.items():
+        try:
+            created = await db[collection_name].create_indexes(indexes)
+            logger.info("Indexes ready on %s: %s", collection_name, ", ".join(created))
+        except PyMongoError as e:
+            logger.error("Index build failed on %s: %s", collection_name, e)
+
 # Root endpoint
 @api_router.get("/")
 async def root():
@@ -794,10 +2756,46 @@ async def root():
 # Include router
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Token invalide")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Serve uploaded files statically
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+
+
+worker_tasks = set()
 
+@app.on_event("startup")
+async def create_db_indexes():
+    await ensure_indexes()
+
+@app.on_event("startup")
+async def load_site_content():
+    try:
+        await site_content_snapshot.load()
+    except PyMongoError as e:
+        logger.warning("Site content snapshot not loaded at startup: %s", e)
+    worker_tasks.add(asyncio.create_task(site_content_snapshot.watch()))
+
+@app.on_event("startup")
+async def start_event_broker():
+    worker_tasks.add(asyncio.create_task(event_broker.watch_stats()))
+    worker_tasks.add(asyncio.create_task(event_broker.watch_versions()))
+
+@app.on_event("startup")
+async def start_outbox_worker():
+    sink = make_notification_sink()
+    if sink is not None:
+        worker_tasks.add(asyncio.create_task(outbox_worker(sink)))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in worker_tasks:
+        task.cancel()
     client.close()
+    bcrypt_executor.shutdown(wait=False)
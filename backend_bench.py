@@ -0,0 +1,582 @@
+import argparse
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+CATEGORIES = ["Actualités", "Éducation", "Événements", "Partenariats", "Témoignages"]
+MEMBER_TYPES = ["actif", "actif", "actif", "fondateur", "honneur"]
+# /api/search p95 the workload must stay under on MongoDB with the 50k-article corpus (--articles 50000)
+SEARCH_P95_TARGET_MS = 100.0
+WORDS = ("école enfants lecture bibliothèque formation village bénévoles alphabétisation cahiers "
+         "enseignants parents communauté projet Nouakchott soutien apprentissage avenir savoir").split()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies):
+    """Latency summary in milliseconds"""
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def git_commit():
+    """Short hash of the checked-out commit, so results can be compared across commits"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def import_server(mongo_url=None, db_name="porte_du_savoir_bench"):
+    """Import backend/server.py in-process, pointed at `db_name` on `mongo_url`, or on mongomock-motor without one"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", db_name)
+    # Every worker shares one client IP in-process: the limiter would turn the run into a 429 benchmark
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    sys.path.insert(0, BACKEND_DIR)
+    import server
+    # The app logs at INFO; one line per in-process request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if mongo_url:
+        server.client = server.AsyncIOMotorClient(mongo_url, **server.mongo_client_options())
+        server.read_db = server.client.get_database(db_name, read_preference=server.read_db.read_preference)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.read_db = server.client[db_name]
+    server.db = server.client[db_name]
+    return server
+
+
+class ResponseTimer:
+    """ASGI wrapper noting when each tagged request's last body chunk was sent.
+
+    The in-process transport only returns once background tasks (image derivatives, precompression)
+    are done, while a real client has its answer as soon as the body is sent.
+    """
+
+    header = "x-bench-request"
+
+    def __init__(self, app):
+        self.app = app
+        self.sent_at = {}
+
+    async def __call__(self, scope, receive, send):
+        key = dict(scope.get("headers") or []).get(self.header.encode()) if scope["type"] == "http" else None
+
+        async def timed_send(message):
+            await send(message)
+            if key and message["type"] == "http.response.body" and not message.get("more_body"):
+                self.sent_at[key.decode()] = time.perf_counter()
+
+        await self.app(scope, receive, timed_send)
+
+
+def lorem(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def read_rss_kb(pid):
+    """Resident set size of a local process in kB, from /proc"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class PorteDuSavoirBenchmark:
+    def __init__(self, base_url="http://localhost:8001", duration=10.0, concurrency=8, server_pid=None):
+        self.base_url = base_url
+        self.duration = duration
+        self.concurrency = concurrency
+        self.server_pid = server_pid
+        self.results = {}
+
+    def admin_token(self, email="admin@portedusavoir.org", password="Admin123!"):
+        requests.post(f"{self.base_url}/api/seed", timeout=30)
+        response = requests.post(
+            f"{self.base_url}/api/auth/login",
+            json={"email": email, "password": password},
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    def bench_login(self, email="admin@portedusavoir.org", password="Admin123!", probe_endpoint="projects"):
+        """Concurrent logins while a single client keeps probing a public route (start the server with RATE_LIMIT_ENABLED=false)"""
+        print(f"\n🔐 Benchmarking login: {self.concurrency} concurrent clients for {self.duration}s")
+        requests.post(f"{self.base_url}/api/seed", timeout=30)
+
+        deadline = time.perf_counter() + self.duration
+        lock = threading.Lock()
+        login_latencies = []
+        statuses = {}
+        probe_latencies = []
+
+        def login_worker():
+            session = requests.Session()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = session.post(
+                    f"{self.base_url}/api/auth/login",
+                    json={"email": email, "password": password},
+                    timeout=30
+                )
+                elapsed = time.perf_counter() - start
+                with lock:
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code == 200:
+                        login_latencies.append(elapsed)
+
+        def probe_worker():
+            session = requests.Session()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                session.get(f"{self.base_url}/api/{probe_endpoint}", timeout=30)
+                probe_latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency + 1) as pool:
+            futures = [pool.submit(login_worker) for _ in range(self.concurrency)]
+            futures.append(pool.submit(probe_worker))
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        result = {
+            "logins_per_second": round(len(login_latencies) / elapsed, 2),
+            "login_statuses": {str(k): v for k, v in sorted(statuses.items())},
+            "login_latency": summarize(login_latencies),
+            f"{probe_endpoint}_latency": summarize(probe_latencies),
+        }
+        self.results["login"] = result
+        print(f"   Logins/s: {result['logins_per_second']}  statuses: {result['login_statuses']}")
+        print(f"   /api/{probe_endpoint} under load: {result[f'{probe_endpoint}_latency']}")
+        return result
+
+    def bench_uploads(self, size_mb=9.5):
+        """N parallel image uploads of `size_mb`, sampling the server's RSS when --server-pid is given"""
+        print(f"\n📤 Benchmarking uploads: {self.concurrency} parallel uploads of {size_mb} MB")
+        token = self.admin_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        payload = os.urandom(int(size_mb * 1024 * 1024))
+
+        rss_samples = []
+        done = threading.Event()
+
+        def sample_rss():
+            while not done.is_set():
+                rss_samples.append(read_rss_kb(self.server_pid))
+                time.sleep(0.01)
+
+        def upload(i):
+            start = time.perf_counter()
+            response = requests.post(
+                f"{self.base_url}/api/upload/image",
+                files={"file": (f"bench-{i}.png", payload, "image/png")},
+                headers=headers,
+                timeout=120
+            )
+            elapsed = time.perf_counter() - start
+            if response.status_code == 200:
+                filename = response.json()["filename"]
+                requests.delete(f"{self.base_url}/api/upload/images/{filename}", headers=headers, timeout=30)
+            return response.status_code, elapsed
+
+        baseline_kb = read_rss_kb(self.server_pid) if self.server_pid else None
+        sampler = threading.Thread(target=sample_rss) if self.server_pid else None
+        if sampler:
+            sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            outcomes = list(pool.map(upload, range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        if sampler:
+            sampler.join()
+
+        statuses = {}
+        for code, _ in outcomes:
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+        result = {
+            "uploads": self.concurrency,
+            "size_mb": size_mb,
+            "statuses": statuses,
+            "wall_time_s": round(elapsed, 3),
+            "upload_latency": summarize([latency for _, latency in outcomes]),
+        }
+        if self.server_pid:
+            result["server_rss_baseline_mb"] = round(baseline_kb / 1024, 1)
+            result["server_rss_peak_mb"] = round(max(rss_samples + [baseline_kb]) / 1024, 1)
+        self.results["uploads"] = result
+        print(f"   Statuses: {statuses}  wall time: {result['wall_time_s']}s")
+        if self.server_pid:
+            print(f"   Server RSS: {result['server_rss_baseline_mb']} MB -> peak {result['server_rss_peak_mb']} MB")
+        return result
+
+    def bench_compression(self, endpoints=("articles?fields=full", "projects?fields=full", "members", "documents"), iterations=200):
+        """Bytes on the wire per encoding, and the CPU cost of compressing each JSON payload"""
+        print("\n🗜️  Benchmarking response compression")
+        requests.post(f"{self.base_url}/api/seed", timeout=30)
+        encodings = ["identity", "gzip"] + (["br"] if brotli else [])
+        session = requests.Session()
+        result = {}
+        for endpoint in endpoints:
+            url = f"{self.base_url}/api/{endpoint}"
+            entry = {}
+            for encoding in encodings:
+                response = session.get(url, headers={"Accept-Encoding": encoding}, stream=True, timeout=30)
+                wire = response.raw.read(decode_content=False)
+                entry[f"{encoding}_bytes"] = len(wire)
+                entry[f"{encoding}_served_as"] = response.headers.get("Content-Encoding", "identity")
+            # Same settings as the server's CompressionMiddleware
+            payload = session.get(url, headers={"Accept-Encoding": "identity"}, timeout=30).content
+            compressors = {"gzip": lambda data: gzip.compress(data, compresslevel=6)}
+            if brotli:
+                compressors["br"] = lambda data: brotli.compress(data, quality=4)
+            for encoding, compressor in compressors.items():
+                start = time.process_time()
+                for _ in range(iterations):
+                    compressor(payload)
+                entry[f"{encoding}_cpu_us_per_request"] = round((time.process_time() - start) / iterations * 1e6, 1)
+            result[endpoint] = entry
+            print(f"   /api/{endpoint}: " + ", ".join(f"{k}={v}" for k, v in entry.items()))
+        self.results["compression"] = result
+        return result
+
+    def bench_serialization(self, items=100, iterations=200):
+        """In-process: validate-then-encode (FastAPI default) vs the FAST_JSON_RESPONSES path, for articles and members"""
+        print(f"\n🧾 Benchmarking list serialization: {items} items x {iterations} iterations")
+        server = import_server()
+        from typing import List
+        from fastapi import Response
+        from fastapi.responses import JSONResponse
+        from pydantic import TypeAdapter
+
+        now = datetime.now().isoformat()
+        cases = {
+            "get_articles": (server.ArticleResponse, [{
+                "id": f"article-{i}", "title": f"Article {i}", "content": "Lorem ipsum dolor sit amet. " * 120,
+                "excerpt": "Résumé de l'article", "category": "Actualités", "image_url": None,
+                "published": True, "created_at": now, "updated_at": now,
+            } for i in range(items)]),
+            "get_members": (server.MemberResponse, [{
+                "id": f"member-{i}", "name": f"Membre {i}", "email": f"membre{i}@example.com", "phone": "+222 22 22 22 22",
+                "member_type": "actif", "bio": "Bénévole", "approved": True, "motivation": None,
+                "created_at": now, "updated_at": now,
+            } for i in range(items)]),
+        }
+
+        result = {}
+        for name, (model, docs) in cases.items():
+            adapter = TypeAdapter(List[model])
+
+            def validated():
+                return JSONResponse(adapter.dump_python(adapter.validate_python(docs), mode="json")).body
+
+            def fast():
+                server.FAST_JSON_RESPONSES = True
+                return server.list_response(docs, model, Response()).body
+
+            # Guard: both paths must produce the same document
+            if json.loads(validated()) != json.loads(fast()):
+                raise AssertionError(f"{name}: fast JSON path changed the response schema")
+
+            entry = {}
+            for label, render in (("validated", validated), ("fast", fast)):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    render()
+                entry[f"{label}_ms"] = round((time.perf_counter() - start) / iterations * 1000, 3)
+            entry["speedup"] = round(entry["validated_ms"] / entry["fast_ms"], 2)
+            result[name] = entry
+            print(f"   {name}: {entry}")
+        self.results["serialization"] = result
+        return result
+
+    async def seed_volume(self, server, articles, members, messages, batch=5000):
+        """Bulk-insert realistic documents straight into the database, bypassing the API"""
+        rng = random.Random(42)
+        start = datetime.now(timezone.utc) - timedelta(days=3 * 365)
+
+        def stamp(i, total):
+            return (start + timedelta(seconds=int(3 * 365 * 86400 * i / max(total, 1)))).isoformat()
+
+        def article(i):
+            return {
+                "id": str(uuid.uuid4()), "title": f"{lorem(rng, 6)[:-1]} {i}", "content": lorem(rng, 400),
+                "excerpt": lorem(rng, 25), "category": rng.choice(CATEGORIES), "image_url": None,
+                "published": rng.random() < 0.9, "created_at": stamp(i, articles), "updated_at": stamp(i, articles),
+            }
+
+        def member(i):
+            return {
+                "id": str(uuid.uuid4()), "name": f"Membre {i}", "email": f"membre{i}@example.org",
+                "phone": f"+222 {rng.randint(20000000, 49999999)}", "member_type": rng.choice(MEMBER_TYPES),
+                "bio": lorem(rng, 20) if rng.random() < 0.3 else None, "motivation": lorem(rng, 30) if rng.random() < 0.1 else None,
+                "approved": rng.random() < 0.95, "created_at": stamp(i, members), "updated_at": stamp(i, members),
+            }
+
+        def message(i):
+            return {
+                "id": str(uuid.uuid4()), "name": f"Visiteur {i}", "email": f"visiteur{i}@example.org",
+                "subject": lorem(rng, 5), "message": lorem(rng, 80), "read": rng.random() < 0.7,
+                "created_at": stamp(i, messages),
+            }
+
+        started = time.perf_counter()
+        for collection, factory, total in (("articles", article, articles), ("members", member, members), ("contact_messages", message, messages)):
+            for offset in range(0, total, batch):
+                await server.db[collection].insert_many([factory(i) for i in range(offset, min(offset + batch, total))])
+        await server.mark_changed("articles", "members", "contact_messages")
+        elapsed = round(time.perf_counter() - started, 2)
+        print(f"   Seeded {articles} articles, {members} members, {messages} messages in {elapsed}s")
+        return elapsed
+
+    def bench_workload(self, mongo_url=None, articles=10000, members=50000, messages=100000, search=None,
+                       search_p95_ms=SEARCH_P95_TARGET_MS):
+        """In-process mixed workload (public reads, admin writes, logins, uploads) through an ASGI transport.
+
+        Runs against a throwaway database on `mongo_url`, or mongomock-motor when none is given. mongomock
+        evaluates every query in Python on the event loop, so only numbers taken on MongoDB are meaningful;
+        it is there to exercise the suite anywhere. The text search route needs real text indexes, so it is
+        part of the mix on MongoDB only (unless `search` is False), and its p95 is checked against
+        `search_p95_ms` there: result["search_target"]["met"] says whether it held.
+        """
+        if search and not mongo_url:
+            raise ValueError("search needs a MongoDB: mongomock-motor has no $text support")
+        search = bool(mongo_url) if search is None else search
+        backend = mongo_url or "mongomock"
+        print(f"\n🏋️  Benchmarking mixed workload in-process on {backend}: {self.concurrency} workers for {self.duration}s")
+        db_name = f"porte_du_savoir_bench_{uuid.uuid4().hex[:8]}"
+        server = import_server(mongo_url, db_name)
+        result = asyncio.run(self.run_workload(
+            server, db_name, bool(mongo_url), articles, members, messages, search
+        ))
+        result["backend"] = backend
+        self.results["workload"] = result
+        for route, entry in result["routes"].items():
+            print(f"   {route}: {entry['requests_per_second']} req/s  p50={entry['p50_ms']}ms p95={entry['p95_ms']}ms p99={entry['p99_ms']}ms  {entry['statuses']}")
+        print(f"   Total: {result['total']['requests_per_second']} req/s")
+        if search:
+            entry = result["routes"].get("GET /api/search", {})
+            p95 = entry.get("p95_ms")
+            met = p95 is not None and set(entry["statuses"]) == {"200"} and p95 <= search_p95_ms
+            result["search_target"] = {"articles": articles, "p95_ms": p95, "target_p95_ms": search_p95_ms, "met": met}
+            print(f"   {'✅' if met else '❌'} Search p95 {p95}ms on {articles} articles (target {search_p95_ms}ms, statuses {entry.get('statuses')})")
+        return result
+
+    async def run_workload(self, server, db_name, real_mongo, articles, members, messages, search):
+        import httpx
+
+        if real_mongo:
+            await server.ensure_indexes()
+        try:
+            seed_seconds = await self.seed_volume(server, articles, members, messages)
+            timer = ResponseTimer(server.app)
+            transport = httpx.ASGITransport(app=timer)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                await client.post("/api/seed")
+                login = {"email": "admin@portedusavoir.org", "password": "Admin123!"}
+                token = (await client.post("/api/auth/login", json=login)).json()["access_token"]
+                admin = {"Authorization": f"Bearer {token}"}
+                article_ids = [doc["id"] for doc in await server.db.articles.find({"published": True}, {"_id": 0, "id": 1}).limit(500).to_list(500)]
+                message_ids = [doc["id"] for doc in await server.db.contact_messages.find({"read": False}, {"_id": 0, "id": 1}).limit(500).to_list(500)]
+                image = self.sample_image()
+
+                latencies = {}
+                statuses = {}
+
+                async def sample(route, method, url, **kwargs):
+                    """One timed request, recorded under `route` from send until its response was sent"""
+                    key = uuid.uuid4().hex
+                    kwargs["headers"] = {**kwargs.get("headers", {}), ResponseTimer.header: key}
+                    start = time.perf_counter()
+                    response = await client.request(method, url, **kwargs)
+                    latencies.setdefault(route, []).append(timer.sent_at.pop(key, time.perf_counter()) - start)
+                    by_status = statuses.setdefault(route, {})
+                    by_status[str(response.status_code)] = by_status.get(str(response.status_code), 0) + 1
+                    return response
+
+                async def public_articles(rng):
+                    await sample("GET /api/articles", "GET", "/api/articles", params={"limit": 20})
+
+                async def public_article(rng):
+                    await sample("GET /api/articles/{id}", "GET", f"/api/articles/{rng.choice(article_ids)}")
+
+                async def public_articles_category(rng):
+                    await sample("GET /api/articles?category", "GET", "/api/articles", params={"category": rng.choice(CATEGORIES), "limit": 20})
+
+                async def public_members(rng):
+                    await sample("GET /api/members", "GET", "/api/members", params={"limit": 50})
+
+                async def public_projects(rng):
+                    await sample("GET /api/projects", "GET", "/api/projects")
+
+                async def public_stats(rng):
+                    await sample("GET /api/stats", "GET", "/api/stats")
+
+                async def public_content(rng):
+                    await sample("GET /api/content", "GET", "/api/content")
+
+                async def public_search(rng):
+                    await sample("GET /api/search", "GET", "/api/search", params={"q": rng.choice(WORDS)})
+
+                async def contact(rng):
+                    payload = {"name": "Visiteur", "email": "visiteur@example.org", "subject": lorem(rng, 4), "message": lorem(rng, 40)}
+                    await sample("POST /api/contact", "POST", "/api/contact", json=payload)
+
+                async def admin_messages(rng):
+                    await sample("GET /api/contact", "GET", "/api/contact", params={"limit": 50}, headers=admin)
+
+                async def admin_mark_read(rng):
+                    await sample("PUT /api/contact/{id}/read", "PUT", f"/api/contact/{rng.choice(message_ids)}/read", headers=admin)
+
+                async def admin_stats(rng):
+                    await sample("GET /api/admin/stats", "GET", "/api/admin/stats", headers=admin)
+
+                async def admin_article_write(rng):
+                    payload = {"title": lorem(rng, 6), "content": lorem(rng, 300), "excerpt": lorem(rng, 20), "category": rng.choice(CATEGORIES)}
+                    response = await sample("POST /api/articles", "POST", "/api/articles", json=payload, headers=admin)
+                    if response.status_code == 200:
+                        # Unpublish it again so the public lists keep their volume; timed as its own route
+                        payload["published"] = False
+                        await sample("PUT /api/articles/{id}", "PUT", f"/api/articles/{response.json()['id']}", json=payload, headers=admin)
+
+                async def logins(rng):
+                    await sample("POST /api/auth/login", "POST", "/api/auth/login", json=login)
+
+                async def uploads(rng):
+                    files = {"file": (f"bench-{uuid.uuid4().hex}.png", image + os.urandom(16), "image/png")}
+                    response = await sample("POST /api/upload/image", "POST", "/api/upload/image", files=files, headers=admin)
+                    if response.status_code == 200:
+                        await sample("DELETE /api/upload/{type}/{filename}", "DELETE", f"/api/upload/images/{response.json()['filename']}", headers=admin)
+
+                # Relative weights: a public site with an occasional admin session
+                mix = [
+                    (public_articles, 20), (public_article, 20), (public_articles_category, 8), (public_members, 8),
+                    (public_projects, 8), (public_stats, 8), (public_content, 8), (contact, 4),
+                    (admin_messages, 3), (admin_mark_read, 3), (admin_stats, 2), (admin_article_write, 2),
+                    (logins, 1), (uploads, 1),
+                ] + ([(public_search, 8)] if search else [])
+                operations, weights = zip(*mix)
+                deadline = time.perf_counter() + self.duration
+
+                async def worker(seed):
+                    rng = random.Random(seed)
+                    while time.perf_counter() < deadline:
+                        await rng.choices(operations, weights)[0](rng)
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker(i) for i in range(self.concurrency)))
+                elapsed = time.perf_counter() - started
+        finally:
+            if real_mongo:
+                await server.client.drop_database(db_name)
+
+        routes = {}
+        for route in sorted(latencies):
+            routes[route] = {
+                **summarize(latencies[route]),
+                "requests_per_second": round(len(latencies[route]) / elapsed, 2),
+                "statuses": statuses[route],
+            }
+        every = [latency for values in latencies.values() for latency in values]
+        return {
+            "volume": {"articles": articles, "members": members, "messages": messages, "seed_seconds": seed_seconds},
+            "concurrency": self.concurrency,
+            "duration_s": round(elapsed, 2),
+            "routes": routes,
+            "total": {**summarize(every), "requests_per_second": round(len(every) / elapsed, 2)},
+        }
+
+    @staticmethod
+    def sample_image():
+        """A small real PNG when Pillow is there (so derivatives get generated), random bytes otherwise"""
+        if Image is None:
+            return os.urandom(64 * 1024)
+        buffer = io.BytesIO()
+        Image.effect_noise((320, 240), 64).convert("RGB").save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porte du Savoir API benchmarks")
+    parser.add_argument("scenarios", nargs="*", default=["login"], help="Scenarios to run: login, uploads, compression, serialization, workload")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--server-pid", type=int, help="PID of a local server process, to sample its memory")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--mongo-url", help="workload: local MongoDB to run against (a throwaway database is used); mongomock-motor when omitted")
+    parser.add_argument("--articles", type=int, default=10000, help="workload: articles to seed")
+    parser.add_argument("--members", type=int, default=50000, help="workload: members to seed")
+    parser.add_argument("--messages", type=int, default=100000, help="workload: contact messages to seed")
+    parser.add_argument("--search", action=argparse.BooleanOptionalAction, default=None,
+                        help="workload: include /api/search in the mix (default: only with --mongo-url, which it requires)")
+    parser.add_argument("--search-p95-ms", type=float, default=SEARCH_P95_TARGET_MS,
+                        help=f"workload: /api/search p95 target; the run fails above it (default {SEARCH_P95_TARGET_MS}ms)")
+    args = parser.parse_args()
+    if args.search and not args.mongo_url:
+        parser.error("--search needs --mongo-url: mongomock-motor has no $text support, so /api/search cannot run on it")
+
+    print(" Starting Porte du Savoir API benchmarks...")
+    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    bench = PorteDuSavoirBenchmark(args.base_url, args.duration, args.concurrency, args.server_pid)
+    for scenario in args.scenarios:
+        if scenario == "workload":
+            bench.bench_workload(args.mongo_url, args.articles, args.members, args.messages, args.search, args.search_p95_ms)
+        else:
+            getattr(bench, f"bench_{scenario}")()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(), "time": datetime.now().isoformat(), "results": bench.results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    # A missed search latency target fails the run, so CI on MongoDB catches regressions
+    return 1 if not bench.results.get("workload", {}).get("search_target", {}).get("met", True) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,8 +35,12 @@ export default function AdminArticles() {
   }, []);
 
   const fetchArticles = async () => {
+    const token = localStorage.getItem("token");
     try {
-      const res = await fetch(`${API}/api/articles?published_only=false`);
+      // Signed-in reads come from the primary, so a save shows up right away
+      const res = await fetch(`${API}/api/articles?published_only=false&fields=full`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
       setArticles(await res.json());
     } catch (e) {
       console.error("Error:", e);
@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { FolderKanban, Newspaper, Users, Mail, UserPlus, MessageSquare } from "lucide-react";
-import { Link } from "react-router-dom";
+import { Link, useNavigate } from "react-router-dom";
 
 const API = process.env.REACT_APP_BACKEND_URL;
 
@@ -14,9 +14,72 @@ export default function AdminDashboard() {
     unread_messages: 0,
   });
   const [loading, setLoading] = useState(true);
+  const navigate = useNavigate();
+
+  // The session token cannot be renewed without the password: log in again
+  const sessionExpired = () => {
+    localStorage.removeItem("token");
+    localStorage.removeItem("user");
+    navigate("/admin/login");
+  };
 
   useEffect(() => {
-    fetchStats();
+    // Live counts pushed by the server; the stream opens with the current counts
+    if (typeof EventSource === "undefined") {
+      fetchStats();
+      return;
+    }
+    let source = null;
+    let retry = null;
+    let unmounted = false;
+
+    // The stream URL only carries a short-lived ticket, so every (re)connection asks for a new one
+    const connect = async () => {
+      const token = localStorage.getItem("token");
+      try {
+        const res = await fetch(`${API}/api/admin/events/ticket`, {
+          method: "POST",
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (res.status === 401) {
+          sessionExpired();
+          return;
+        }
+        if (!res.ok) {
+          throw new Error(`Ticket refusé (${res.status})`);
+        }
+        const { ticket } = await res.json();
+        if (unmounted) return;
+        source = new EventSource(`${API}/api/admin/events?ticket=${encodeURIComponent(ticket)}`);
+        source.addEventListener("stats", (event) => {
+          setStats(JSON.parse(event.data));
+          setLoading(false);
+        });
+        source.addEventListener("resync", fetchStats);
+        source.addEventListener("expired", () => {
+          source.close();
+          sessionExpired();
+        });
+        source.onerror = () => {
+          // The browser gave up (e.g. the ticket expired while it was retrying): start over with a new one
+          if (source.readyState === EventSource.CLOSED) {
+            fetchStats();
+            retry = setTimeout(connect, 5000);
+          }
+        };
+      } catch (e) {
+        console.error("Error:", e);
+        fetchStats();
+        retry = setTimeout(connect, 5000);
+      }
+    };
+    connect();
+
+    return () => {
+      unmounted = true;
+      clearTimeout(retry);
+      if (source) source.close();
+    };
   }, []);
 
   const fetchStats = async () => {
@@ -25,7 +88,9 @@ export default function AdminDashboard() {
       const res = await fetch(`${API}/api/admin/stats`, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      if (res.ok) {
+      if (res.status === 401) {
+        sessionExpired();
+      } else if (res.ok) {
         setStats(await res.json());
       }
     } catch (e) {
@@ -30,8 +30,12 @@ export default function AdminDocuments() {
   }, []);
 
   const fetchDocuments = async () => {
+    const token = localStorage.getItem("token");
     try {
-      const res = await fetch(`${API}/api/documents`);
+      // Signed-in reads come from the primary, so a save shows up right away
+      const res = await fetch(`${API}/api/documents`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
       setDocuments(await res.json());
     } catch (e) {
       console.error("Error:", e);
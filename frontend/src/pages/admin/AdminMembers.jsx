@@ -34,7 +34,9 @@ export default function AdminMembers() {
     const token = localStorage.getItem("token");
     try {
       const [membersRes, pendingRes] = await Promise.all([
-        fetch(`${API}/api/members`),
+        fetch(`${API}/api/members`, {
+          headers: { Authorization: `Bearer ${token}` },
+        }),
         fetch(`${API}/api/members/pending`, {
           headers: { Authorization: `Bearer ${token}` },
         }),
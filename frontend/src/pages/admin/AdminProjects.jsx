@@ -32,8 +32,12 @@ export default function AdminProjects() {
   }, []);
 
   const fetchProjects = async () => {
+    const token = localStorage.getItem("token");
     try {
-      const res = await fetch(`${API}/api/projects`);
+      // Signed-in reads come from the primary, so a save shows up right away
+      const res = await fetch(`${API}/api/projects?fields=full`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
       setProjects(await res.json());
     } catch (e) {
       console.error("Error:", e);